@@ -0,0 +1,247 @@
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from headless import config_overrides
+from physics_world import PhysicsWorld
+import config
+
+DEFAULT_COUNTS = [100, 500, 1000, 5000, 10000, 20000]
+QUICK_COUNTS = [100, 1000]
+SHAPE_TYPES = ["circle", "square", "triangle"]
+
+
+def _rss_bytes():
+    """Текущий объём резидентной памяти процесса (только Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def scene_size(count, radius):
+    """Размер мира, в который сетка из count тел помещается с зазором."""
+    cell = 2 * radius + 2
+    cols = max(10, int(math.ceil(math.sqrt(count * 1.5))))
+    rows = int(math.ceil(count / cols))
+    return cols * cell + 40, rows * cell * 2 + 40
+
+
+def build_scene(shape_type, count, radius, mass=1.0):
+    """Создание мира с count телами формы shape_type, уложенными сеткой."""
+    width, height = scene_size(count, radius)
+    physics = PhysicsWorld(width, height)
+    cell = 2 * radius + 2
+    cols = int((width - 40) // cell)
+    for i in range(count):
+        row, col = divmod(i, cols)
+        pos = (20 + cell * col + cell / 2 + (row % 2), height - 20 - cell * row - cell / 2)
+        physics.add_shape(shape_type, radius, mass, pos)
+    return physics
+
+
+def measure_build(shape_type, count, radius):
+    """Время построения сцены и память на одно тело."""
+    gc.collect()
+    rss_before = _rss_bytes()
+    tracemalloc.start()
+    start = time.perf_counter()
+    physics = build_scene(shape_type, count, radius)
+    build_time = time.perf_counter() - start
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = _rss_bytes()
+    result = {
+        "build_s": build_time,
+        "py_bytes_per_body": traced / count
+    }
+    if rss_before is not None and rss_after is not None:
+        result["rss_bytes_per_body"] = max(0, rss_after - rss_before) / count
+    return physics, result
+
+
+def measure_steps(physics, steps, warmup, dt=1 / 60):
+    """Число шагов PhysicsWorld.update в секунду."""
+    for _ in range(warmup):
+        physics.update(dt)
+    start = time.perf_counter()
+    for _ in range(steps):
+        physics.update(dt)
+    elapsed = time.perf_counter() - start
+    return {"steps_per_s": steps / elapsed, "step_ms": elapsed / steps * 1000}
+
+
+def measure_draw(graphics, physics, frames):
+    """Среднее время Graphics.draw_objects с эффектом цвета и без (мс)."""
+    result = {}
+    saved_effect = config.color_effect
+    try:
+        for effect in (False, True):
+            config.color_effect = effect
+            graphics.clear()
+            graphics.draw_objects(physics.space, physics.time, physics.shape_generation)
+            start = time.perf_counter()
+            for _ in range(frames):
+                graphics.clear()
+                graphics.draw_objects(physics.space, physics.time, physics.shape_generation)
+            elapsed = time.perf_counter() - start
+            key = "draw_effect_ms" if effect else "draw_ms"
+            result[key] = elapsed / frames * 1000
+    finally:
+        config.color_effect = saved_effect
+    return result
+
+
+def create_graphics(width=1200, height=800):
+    """Создание окна Pygame (без дисплея используется драйвер dummy)."""
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from graphics import Graphics
+    pygame.init()
+    return Graphics(width, height, "Бенчмарк", (255, 255, 255))
+
+
+def fit_graphics(graphics, physics):
+    """Внеэкранная поверхность размером с мир, чтобы в кадр попадали все тела.
+
+    Окно бенчмарка меньше больших сцен, и без этого отрисовка batch
+    пропускала бы тела за краем окна, а debug_draw рисовал бы все.
+    """
+    import pygame
+    graphics.set_surface(pygame.Surface((int(physics.width), int(physics.height))))
+
+
+def run_benchmarks(counts, shape_types, radius=10.0, steps=30, warmup=10,
+                   frames=10, draw=True, broadphases=None, threads=None, renderers=None,
+                   sprite_caches=None):
+    """Прогон всех сочетаний числа тел, типа формы, широкой фазы, потоков и отрисовки."""
+    graphics = create_graphics() if draw else None
+    results = []
+    variants = [(broadphase, thread_count, renderer, sprite_cache)
+                for broadphase in broadphases or [config.broadphase]
+                for thread_count in threads or [config.solver_threads]
+                for renderer in renderers or [config.renderer]
+                for sprite_cache in sprite_caches or [config.sprite_cache_size]]
+    with config_overrides({"radius": radius}):
+        for broadphase, thread_count, renderer, sprite_cache in variants:
+            settings = {"broadphase": broadphase, "solver_threads": thread_count,
+                        "renderer": renderer, "sprite_cache_size": sprite_cache}
+            with config_overrides(settings):
+                for shape_type in shape_types:
+                    for count in counts:
+                        physics, row = measure_build(shape_type, count, radius)
+                        row.update(shape=shape_type, count=count, **settings)
+                        row.update(measure_steps(physics, steps, warmup))
+                        if graphics is not None:
+                            fit_graphics(graphics, physics)
+                            row["scene"] = [physics.width, physics.height]
+                            row.update(measure_draw(graphics, physics, frames))
+                        results.append(row)
+                        print(_format_row(row), flush=True)
+                        del physics
+    return results
+
+
+def _format_row(row):
+    """Строка отчёта для консоли."""
+    text = (f"{row['shape']:<9}{row['count']:>7} тел, {row['broadphase']}, "
+            f"потоков {row['solver_threads']}, {row['renderer']}, "
+            f"спрайтов {row['sprite_cache_size']}: "
+            f"{row['steps_per_s']:9.1f} шаг/с, "
+            f"построение {row['build_s']:.3f} с, {row['py_bytes_per_body']:.0f} Б/тело")
+    if "draw_ms" in row:
+        text += f", отрисовка {row['draw_ms']:.2f} мс / {row['draw_effect_ms']:.2f} мс (эффект)"
+    return text
+
+
+def compare(results, baseline, tolerance):
+    """Поиск регрессий относительно базового прогона.
+
+    Регрессия — падение шагов в секунду или рост времени отрисовки больше,
+    чем на долю tolerance.
+    """
+    def key(row):
+        return (row["shape"], row["count"], row.get("broadphase", "auto"),
+                row.get("solver_threads", 1), row.get("renderer", "debug_draw"),
+                row.get("sprite_cache_size", 0))
+
+    reference = {key(row): row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        base = reference.get(key(row))
+        if base is None:
+            continue
+        if row["steps_per_s"] < base["steps_per_s"] * (1 - tolerance):
+            regressions.append((row["shape"], row["count"], "steps_per_s",
+                                base["steps_per_s"], row["steps_per_s"]))
+        for key in ("draw_ms", "draw_effect_ms"):
+            if key in row and key in base and row[key] > base[key] * (1 + tolerance):
+                regressions.append((row["shape"], row["count"], key, base[key], row[key]))
+    return regressions
+
+
+def main(argv=None):
+    """Точка входа командной строки бенчмарка."""
+    parser = argparse.ArgumentParser(description="Бенчмарк масштабирования PhysicsWorld")
+    parser.add_argument("--counts", type=int, nargs="+", help="Числа тел в сцене")
+    parser.add_argument("--quick", action="store_true", help="Короткий прогон (100 и 1000 тел)")
+    parser.add_argument("--shapes", nargs="+", choices=SHAPE_TYPES, default=SHAPE_TYPES)
+    parser.add_argument("--radius", type=float, default=10.0, help="Радиус тел")
+    parser.add_argument("--broadphase", nargs="+", choices=["bbtree", "spatial_hash", "auto"],
+                        help="Режимы широкой фазы для сравнения (по умолчанию config.broadphase)")
+    parser.add_argument("--threads", type=int, nargs="+",
+                        help="Числа потоков решателя для сравнения (по умолчанию config.solver_threads)")
+    parser.add_argument("--renderer", nargs="+", choices=["batch", "debug_draw"],
+                        help="Способы отрисовки для сравнения (по умолчанию config.renderer)")
+    parser.add_argument("--sprite-cache", type=int, nargs="+",
+                        help="Размеры кэша спрайтов для сравнения, 0 — без спрайтов "
+                             "(по умолчанию config.sprite_cache_size)")
+    parser.add_argument("--steps", type=int, default=30, help="Замеряемых шагов физики")
+    parser.add_argument("--frames", type=int, default=10, help="Замеряемых кадров отрисовки")
+    parser.add_argument("--no-draw", action="store_true", help="Не замерять отрисовку")
+    parser.add_argument("--output", default="benchmark_results.json", help="Файл результатов")
+    parser.add_argument("--baseline", help="Результаты предыдущего прогона для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Допустимое ухудшение относительно базы (доля)")
+    args = parser.parse_args(argv)
+
+    counts = args.counts or (QUICK_COUNTS if args.quick else DEFAULT_COUNTS)
+    results = run_benchmarks(counts, args.shapes, radius=args.radius, steps=args.steps,
+                             frames=args.frames, draw=not args.no_draw,
+                             broadphases=args.broadphase, threads=args.threads,
+                             renderers=args.renderer, sprite_caches=args.sprite_cache)
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "radius": args.radius,
+        "tolerance": args.tolerance,
+        "results": results
+    }
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        report["regressions"] = [
+            {"shape": shape, "count": count, "metric": metric, "baseline": base, "value": value}
+            for shape, count, metric, base, value in regressions
+        ]
+        for shape, count, metric, base, value in regressions:
+            print(f"Регрессия: {shape} {count} тел, {metric}: {base:.2f} -> {value:.2f}")
+        exit_code = 1 if regressions else 0
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
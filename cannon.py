@@ -1,47 +1,77 @@
 import math
+import numpy as np
 import pygame
 import pymunk
+from point_buffer import PointBuffer
+from salvo import Salvo
+import trajectory
 import config
 
+BALL_COLLISION_TYPE = 1  # Тип столкновений мяча пушки
+GROUND_COLLISION_TYPE = 2  # Тип столкновений нижней границы мира
+
+
 class Cannon:
     """Класс для управления пушкой в симуляции."""
+    BODY_SIZE = (180, 140)  # Размер спрайта пушки
+    BODY_ANCHOR = (90, 90)  # Положение центра пушки в спрайте
 
     def __init__(self, physics):
         self.physics = physics
         self.x = 70  # Смещение пушки по X
         self.y = 700  # Смещение пушки по Y (для ствола и мячика)
-        self.trajectory_points = []
-        self.velocity_points = []
-        self.range_data = []
+        self.trajectory_points = PointBuffer(config.trajectory_capacity,
+                                             config.trajectory_min_distance)
+        self.velocity_points = PointBuffer(config.trajectory_capacity)  # (время, скорость)
+        self.range_data = []  # (угол, дальность, начальная скорость в м/с)
+        self.salvo = Salvo(self)  # Мячи залпа (config.salvo_count > 1)
         self.ball = None
         self.fired = False
-        self.start_time = 0
-        self.end_time = 0
+        self.start_time = 0  # Время симуляции выстрела, с
+        self.end_time = 0  # Время симуляции приземления, с (0 — мяч в полёте)
         self.font = None
         self.scale_font = None
-        self._setup_collision_handler()
+        self._labels = {}  # (текст, цвет, шрифт) -> отрендеренная надпись
+        self._axes = None  # Кэшированный слой осей и шкалы
+        self._axes_key = None
+        self._body = None  # Кэшированный спрайт пушки
+        self._body_key = None
+        self._timer_surface = None
+        self._timer_key = None
+        self.attach(self.physics.space)
+
+    def attach(self, space):
+        """Подключение пушки к пространству (после его пересоздания)."""
+        self._setup_collision_handler(space)
 
-    def _setup_collision_handler(self):
-        """Настройка обработчика столкновений."""
-        handler = self.physics.space.add_collision_handler(0, 0)
+    def _setup_collision_handler(self, space):
+        """Настройка обработчика касания мячом земли.
+
+        Обработчик зарегистрирован только для пары мяч — земля, поэтому
+        остальные контакты мира не вызывают Python-код.
+        """
+        handler = space.add_collision_handler(BALL_COLLISION_TYPE, GROUND_COLLISION_TYPE)
         handler.data["cannon"] = self
-        handler.post_solve = self._collision_callback
+        handler.begin = self._collision_callback
 
     def _collision_callback(self, arbiter, space, data):
-        """Обработка столкновений мяча с поверхностью."""
+        """Первое касание мячом земли завершает полёт."""
         cannon = data["cannon"]
-        if cannon.fired and cannon.ball in arbiter.shapes:
-            for shape in arbiter.shapes:
-                if isinstance(shape, pymunk.Poly) and shape.body.body_type == pymunk.Body.STATIC:
-                    # Проверяем столкновение с землей (y ≈ 700)
-                    if abs(shape.body.position.y - self.y) < 10:
-                        if cannon.end_time == 0:
-                            cannon.end_time = pygame.time.get_ticks()
-                            if cannon.trajectory_points:
-                                max_x = max(x for x, y in self.trajectory_points)
-                                range_m = (max_x - self.x) / 100  # Относительно x=70
-                                angle = config.angle
-                                cannon.range_data.append((angle, range_m))
+        ball = arbiter.shapes[0]  # Форма с типом BALL_COLLISION_TYPE
+        if ball is cannon.ball:
+            if cannon.fired and cannon.end_time == 0:
+                cannon._land(ball.body.position.x, ball.body.position.y)
+        else:
+            cannon.salvo.land_shape(ball)
+        return True
+
+    def _land(self, x, y):
+        """Завершение полёта в точке (x, y) и запись дальности."""
+        self.fired = False
+        self.end_time = self.physics.time
+        self.trajectory_points.append(x, y, force=True)
+        range_m = (self.trajectory_points.max_x - self.x) / 100  # Относительно x=70
+        self.range_data.append((config.angle, range_m, config.initial_velocity / 100))
 
     def handle_mouse_down(self, event):
         """Обработка нажатия мыши."""
@@ -60,15 +90,20 @@ class Cannon:
                 except Exception:
                     pass
                 return
-            if self.ball:
-                try:
-                    self.physics.space.remove(self.ball.body, self.ball)
-                except Exception:
-                    pass
-                self.ball = None
-            self.trajectory_points = []
-            self.velocity_points = []
-            self.ball = self.create_ball()
+            self.load_ball()
+
+    def load_ball(self):
+        """Зарядка нового мяча вместо предыдущего."""
+        if self.ball:
+            try:
+                self.physics.remove_shape(self.ball)
+            except Exception:
+                pass
+            self.ball = None
+        self.trajectory_points.clear()
+        self.velocity_points.clear()
+        self.ball = self.create_ball()
+        return self.ball
 
     def create_ball(self):
         """Создание мяча для выстрела."""
@@ -82,13 +117,25 @@ class Cannon:
                 friction=config.friction
             )
             ball.body.body_type = pymunk.Body.KINEMATIC
+            ball.collision_type = BALL_COLLISION_TYPE
             return ball
         except Exception:
             return None
 
     def handle_mouse_up(self, event):
         """Обработка отпускания мыши."""
-        if event.button == 1 and self.ball and config.shape_type != "button":
+        if event.button == 1:
+            self.fire()
+
+    def fire(self):
+        """Выстрел заряженным мячом под углом config.angle.
+
+        При config.salvo_count > 1 вместо одного мяча стреляет залп.
+        """
+        if self.ball and config.shape_type != "button" and config.salvo_count > 1:
+            self.fire_salvo()
+            return
+        if self.ball and config.shape_type != "button":
             try:
                 self.ball.body.body_type = pymunk.Body.DYNAMIC
                 angle_rad = math.radians(config.angle)
@@ -96,13 +143,42 @@ class Cannon:
                 velocity_y = -config.initial_velocity * math.sin(angle_rad)
                 self.ball.body.velocity = (velocity_x, velocity_y)
                 self.fired = True
-                self.start_time = pygame.time.get_ticks()
+                self.start_time = self.physics.time
                 self.end_time = 0
             except Exception:
                 self.ball = None
 
+    def fire_salvo(self, count=None):
+        """Залп из count мячей (по умолчанию config.salvo_count).
+
+        Углы распределяются равномерно в пределах config.salvo_angle_spread
+        вокруг config.angle, скорости — в пределах
+        config.salvo_velocity_spread (м/с) вокруг начальной скорости.
+        """
+        count = config.salvo_count if count is None else count
+        if self.ball:
+            try:
+                self.physics.remove_shape(self.ball)
+            except Exception:
+                pass
+            self.ball = None
+        self.fired = False
+        offsets = np.linspace(-0.5, 0.5, count) if count > 1 else np.zeros(count)
+        angles = np.clip(config.angle + offsets * config.salvo_angle_spread, 0, 90)
+        velocities = np.maximum(config.initial_velocity / 100
+                                + offsets * config.salvo_velocity_spread, 0)
+        return self.salvo.fire(angles, velocities, BALL_COLLISION_TYPE)
+
+    def find_optimal_angle(self, velocity=None):
+        """Угол наибольшей дальности и дальность (м) для текущих параметров.
+
+        Расчёт по trajectory.optimal_angle с кэшем результатов на диске.
+        """
+        return trajectory.optimal_angle(velocity)
+
     def update(self):
         """Обновление состояния пушки."""
+        self.salvo.update()
         if self.fired and self.ball and self.ball.body and config.shape_type != "button":
             try:
                 x, y = self.ball.body.position
@@ -112,110 +188,192 @@ class Cannon:
                     self.ball = None
                     return
                 if y >= self.y and self.end_time == 0:
-                    self.fired = False
-                    self.end_time = pygame.time.get_ticks()
-                    self.trajectory_points.append((x, self.y))
-                    max_x = max(x for x, y in self.trajectory_points)
-                    range_m = (max_x - self.x) / 100
-                    angle = config.angle
-                    self.range_data.append((angle, range_m))
+                    self._land(x, self.y)
                     return
-                self.trajectory_points.append((x, y))
+                self.trajectory_points.append(x, y)
                 velocity = self.ball.body.velocity
                 speed = math.sqrt(velocity[0] ** 2 + velocity[1] ** 2)
-                elapsed_time = (pygame.time.get_ticks() - self.start_time) / 1000
-                self.velocity_points.append((elapsed_time, speed / 100))
-                if speed > 0 and config.air_resistance > 0:
-                    rho = 1.225
-                    c_d = 0.47
-                    radius_m = config.radius / 100  # Преобразование радиуса из см в м
-                    area = math.pi * radius_m ** 2  # Площадь сечения, м²
-                    k = 0.5 * rho * c_d * area * config.air_resistance
-                    drag_force = (-k * speed * velocity[0], -k * speed * velocity[1])
-                    self.ball.body.apply_force_at_local_point(drag_force, (0, 0))
+                elapsed_time = self.physics.time - self.start_time
+                self.velocity_points.append(elapsed_time, speed / 100)
+                # Сопротивление воздуха прикладывает PhysicsWorld ко всем телам
             except Exception:
                 self.fired = False
                 self.ball = None
 
-    def draw(self, screen):
-        """Отрисовка пушки и траектории."""
-        if self.font is None:
-            self.font = pygame.font.SysFont('Arial', 30)
-        if self.scale_font is None:
-            self.scale_font = pygame.font.SysFont('Arial', 20)
+    def get_state(self, index):
+        """Состояние пушки для файла состояния мира.
+
+        index — словарь форма -> номер тела в файле.
+        """
+        return {
+            "ball": index.get(self.ball),
+            "fired": self.fired,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "trajectory_points": [tuple(point) for point in self.trajectory_points],
+            "velocity_points": [tuple(point) for point in self.velocity_points],
+            "range_data": [tuple(point) for point in self.range_data],
+            "salvo": self.salvo.get_state(index)
+        }
+
+    def set_state(self, state, shapes):
+        """Восстановление состояния пушки; shapes — формы в порядке файла."""
+        self.ball = shapes[state["ball"]] if state["ball"] is not None else None
+        if self.ball is not None:
+            self.ball.collision_type = BALL_COLLISION_TYPE
+        self.fired = state["fired"] and self.ball is not None
+        self.start_time = state["start_time"]
+        self.end_time = state["end_time"]
+        self.trajectory_points.clear()
+        self.trajectory_points.extend(state["trajectory_points"])
+        self.velocity_points.clear()
+        self.velocity_points.extend(state["velocity_points"])
+        self.range_data = [tuple(point) for point in state["range_data"]]
+        self.salvo.set_state(state.get("salvo"), shapes, BALL_COLLISION_TYPE)
+
+    def merge_sweep(self, results):
+        """Добавление результатов серии выстрелов (headless.sweep_cannon).
+
+        Дальности всех выстрелов дополняют range_data, а кривой скорости
+        становится выстрел, ближайший к текущим углу и скорости пушки.
+        """
+        self.range_data.extend((result["angle"], result["range"], result["velocity"])
+                               for result in results if result["range"] is not None)
+        shots = [result for result in results if result.get("velocity_points")]
+        if shots:
+            closest = min(shots, key=lambda result: (
+                abs(result["angle"] - config.angle),
+                abs(result["velocity"] - config.initial_velocity / 100)))
+            self.velocity_points.clear()
+            self.velocity_points.extend(closest["velocity_points"])
+
+    @property
+    def flight_time(self):
+        """Время полёта последнего выстрела по часам симуляции, с."""
+        end_time = self.end_time if self.end_time > 0 else self.physics.time
+        return end_time - self.start_time
+
+    def _label(self, text, color, font):
+        """Отрендеренная надпись из кэша надписей."""
+        key = (text, color, font)
+        label = self._labels.get(key)
+        if label is None:
+            label = font.render(text, True, color)
+            self._labels[key] = label
+        return label
+
+    def _build_axes(self, size):
+        """Слой с осями и подписями шкалы для текущей темы.
+
+        Слой прозрачный с RLE-ускорением: почти пустая поверхность во весь
+        экран накладывается за доли миллисекунды. Альфа цветов отброшена,
+        так как при рисовании прямо на экран она и раньше не учитывалась.
+        """
+        axes = pygame.Surface(size, pygame.SRCALPHA)
 
         meters_to_pixels = 100
         grid_step = meters_to_pixels
         origin_x = self.x
         origin_y = self.y
 
-        axis_color = (255, 255, 255, 255) if config.theme == "dark" else (0, 0, 0, 255)
-        text_color = (255, 255, 255, 255) if config.theme == "dark" else (0, 0, 0, 255)
-
-        cannon_base_color = (0, 150, 0) if config.shape_type == "button" and config.static_mode else (80, 80, 80)
-        cannon_highlight_color = (0, 180, 0) if config.shape_type == "button" and config.static_mode else (100, 100, 100)
-        barrel_color = (0, 150, 0) if config.shape_type == "button" and config.static_mode else (120, 120, 120)
-        barrel_shadow_color = (50, 50, 50, 100)
-        wheel_color = (60, 60, 60) if config.theme == "dark" else (40, 40, 40)
+        axis_color = (255, 255, 255) if config.theme == "dark" else (0, 0, 0)
+        text_color = axis_color
 
-        pygame.draw.line(screen, axis_color, (origin_x, origin_y),
+        pygame.draw.line(axes, axis_color, (origin_x, origin_y),
                          (self.physics.width, origin_y), 2)
-        pygame.draw.line(screen, axis_color, (origin_x, origin_y), (origin_x, 0), 2)
+        pygame.draw.line(axes, axis_color, (origin_x, origin_y), (origin_x, 0), 2)
 
         for x in range(0, self.physics.width - origin_x, grid_step):
             meters_x = x // meters_to_pixels
-            label = self.scale_font.render(f"{meters_x} м", True, text_color)
-            screen.blit(label, (origin_x + x, origin_y + 5))
+            label = self._label(f"{meters_x} м", text_color, self.scale_font)
+            axes.blit(label, (origin_x + x, origin_y + 5))
 
         for y in range(0, origin_y, grid_step):
             meters_y = y // meters_to_pixels
-            label = self.scale_font.render(f"{meters_y} м", True, text_color)
-            screen.blit(label, (origin_x - 40, origin_y - y - 10))
+            label = self._label(f"{meters_y} м", text_color, self.scale_font)
+            axes.blit(label, (origin_x - 40, origin_y - y - 10))
+
+        axes.set_alpha(255, pygame.RLEACCEL)
+        return axes
 
-        end_x = self.x + 80 * math.cos(math.radians(config.angle))
-        end_y = self.y - 80 * math.sin(math.radians(config.angle))
-        pygame.draw.line(screen, barrel_shadow_color, (self.x + 2, self.y + 2),
-                         (end_x + 2, end_y + 2), 7)
-        pygame.draw.line(screen, barrel_color, (self.x, self.y), (end_x, end_y), 5)
-        pygame.draw.line(screen, (200, 200, 200, 150), (self.x, self.y), (end_x, end_y), 2)
+    def _build_body(self):
+        """Спрайт пушки (ствол, лафет, колёса) для текущих угла, темы и режима.
 
-        base_y = self.y + 20
-        pygame.draw.rect(screen, cannon_base_color, (self.x - 40, base_y - 25, 80, 30), border_radius=5)
-        pygame.draw.rect(screen, cannon_highlight_color, (self.x - 40, base_y - 25, 80, 15), border_radius=5)
-        pygame.draw.rect(screen, (0, 0, 0, 50), (self.x - 40, base_y - 25, 80, 30), 2, border_radius=5)
+        Центр пушки находится в точке BODY_ANCHOR спрайта.
+        """
+        body = pygame.Surface(self.BODY_SIZE, pygame.SRCALPHA)
+        x, y = self.BODY_ANCHOR
+
+        button_mode = config.shape_type == "button" and config.static_mode
+        cannon_base_color = (0, 150, 0) if button_mode else (80, 80, 80)
+        cannon_highlight_color = (0, 180, 0) if button_mode else (100, 100, 100)
+        barrel_color = (0, 150, 0) if button_mode else (120, 120, 120)
+        barrel_shadow_color = (50, 50, 50)
+        wheel_color = (60, 60, 60) if config.theme == "dark" else (40, 40, 40)
+
+        end_x = x + 80 * math.cos(math.radians(config.angle))
+        end_y = y - 80 * math.sin(math.radians(config.angle))
+        pygame.draw.line(body, barrel_shadow_color, (x + 2, y + 2), (end_x + 2, end_y + 2), 7)
+        pygame.draw.line(body, barrel_color, (x, y), (end_x, end_y), 5)
+        pygame.draw.line(body, (200, 200, 200), (x, y), (end_x, end_y), 2)
+
+        base_y = y + 20
+        pygame.draw.rect(body, cannon_base_color, (x - 40, base_y - 25, 80, 30), border_radius=5)
+        pygame.draw.rect(body, cannon_highlight_color, (x - 40, base_y - 25, 80, 15), border_radius=5)
+        pygame.draw.rect(body, (0, 0, 0), (x - 40, base_y - 25, 80, 30), 2, border_radius=5)
 
         wheel_y = base_y + 5
-        pygame.draw.circle(screen, wheel_color, (self.x - 20, wheel_y), 10)
-        pygame.draw.circle(screen, wheel_color, (self.x + 20, wheel_y), 10)
-        pygame.draw.circle(screen, (255, 255, 255, 100), (self.x - 20, wheel_y), 3)
-        pygame.draw.circle(screen, (255, 255, 255, 100), (self.x + 20, wheel_y), 3)
+        pygame.draw.circle(body, wheel_color, (x - 20, wheel_y), 10)
+        pygame.draw.circle(body, wheel_color, (x + 20, wheel_y), 10)
+        pygame.draw.circle(body, (255, 255, 255), (x - 20, wheel_y), 3)
+        pygame.draw.circle(body, (255, 255, 255), (x + 20, wheel_y), 3)
+        return body
 
-        for point in self.trajectory_points:
-            try:
-                if (isinstance(point, tuple) and len(point) == 2
-                        and isinstance(point[0], (int, float)) and isinstance(point[1], (int, float))
-                        and math.isfinite(point[0]) and math.isfinite(point[1])):
-                    pygame.draw.circle(screen, (200, 50, 50), (int(point[0]), int(point[1])), 2)
-            except Exception:
-                pass
+    def draw(self, screen):
+        """Отрисовка пушки и траектории."""
+        if self.font is None:
+            self.font = pygame.font.SysFont('Arial', 30)
+        if self.scale_font is None:
+            self.scale_font = pygame.font.SysFont('Arial', 20)
+
+        # Слои перестраиваются только при смене темы, размера, угла или режима кнопки
+        axes_key = (config.theme, screen.get_size(), self.physics.width)
+        if axes_key != self._axes_key:
+            self._axes = self._build_axes(screen.get_size())
+            self._axes_key = axes_key
+        body_key = (config.theme, config.angle,
+                    config.shape_type == "button" and config.static_mode)
+        if body_key != self._body_key:
+            self._body = self._build_body()
+            self._body_key = body_key
+        screen.blit(self._axes, (0, 0))
+        screen.blit(self._body, (self.x - self.BODY_ANCHOR[0], self.y - self.BODY_ANCHOR[1]))
+
+        self.salvo.draw(screen)
+        # Буфер хранит только конечные координаты, путь рисуется одним вызовом
+        if len(self.trajectory_points) > 1:
+            pygame.draw.lines(screen, (200, 50, 50), False,
+                              self.trajectory_points.array().tolist(), 3)
 
         if self.fired or self.end_time > 0:
-            current_time = pygame.time.get_ticks()
-            elapsed_time = (self.end_time if self.end_time > 0 else current_time) - self.start_time
-            elapsed_time /= 1000
-            timer_text = self.font.render(f"Время: {elapsed_time:.2f} сек", True, text_color)
-            screen.blit(timer_text, (screen.get_width() - 220, 10))
+            text_color = (255, 255, 255) if config.theme == "dark" else (0, 0, 0)
+            text = f"Время: {self.flight_time:.2f} сек"
+            if (text, text_color) != self._timer_key:
+                self._timer_surface = self.font.render(text, True, text_color)
+                self._timer_key = (text, text_color)
+            screen.blit(self._timer_surface, (screen.get_width() - 220, 10))
 
     def reset(self):
         """Сброс состояния пушки."""
         if self.ball:
             try:
-                self.physics.space.remove(self.ball.body, self.ball)
+                self.physics.remove_shape(self.ball)
             except Exception:
                 pass
             self.ball = None
-        self.trajectory_points = []
-        self.velocity_points = []
+        self.salvo.clear()
+        self.trajectory_points.clear()
+        self.velocity_points.clear()
         self.fired = False
         self.start_time = 0
         self.end_time = 0
\ No newline at end of file
@@ -0,0 +1,97 @@
+import threading
+import time
+
+
+class Command:
+    """Отложенный вызов, переданный из интерфейса в поток симуляции."""
+    __slots__ = ("func", "args", "key", "submitted")
+
+    def __init__(self, func, args, key, submitted):
+        self.func = func
+        self.args = args
+        self.key = key
+        self.submitted = submitted
+
+
+class CommandQueue:
+    """Ограниченная очередь команд от интерфейса к потоку симуляции.
+
+    Интерфейс только ставит команды в очередь, а поток симуляции выполняет
+    их пачкой на границе кадра, поэтому мир не меняется во время space.step.
+    Команда с тем же ключом, что и последняя в очереди (например, движение
+    ползунка), схлопывается с ней в одну с последними аргументами. С более
+    ранними командами ключ не схлопывается, чтобы не менять порядок
+    выполнения относительно команд, поставленных между ними.
+    """
+
+    def __init__(self, maxsize=1024):
+        """Инициализация очереди с ограничением на число команд."""
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._pending = []
+        self.submitted = 0
+        self.applied = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.last_batch = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+
+    def submit(self, func, *args, key=None):
+        """Постановка команды в очередь; False, если очередь переполнена."""
+        now = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            if key is not None and self._pending and self._pending[-1].key == key:
+                command = self._pending[-1]
+                command.func = func
+                command.args = args
+                self.coalesced += 1
+                return True
+            if len(self._pending) >= self.maxsize:
+                self.dropped += 1
+                print("Очередь команд переполнена, команда отброшена")
+                return False
+            self._pending.append(Command(func, args, key, now))
+            self.max_depth = max(self.max_depth, len(self._pending))
+        return True
+
+    def apply_pending(self):
+        """Выполнение всех накопленных команд; вызывается потоком симуляции."""
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch = self._pending
+            self._pending = []
+        latency = time.perf_counter() - batch[0].submitted
+        for command in batch:
+            try:
+                command.func(*command.args)
+            except Exception as e:
+                print(f"Ошибка при выполнении команды: {e}")
+        self.applied += len(batch)
+        self.last_batch = len(batch)
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        return len(batch)
+
+    @property
+    def depth(self):
+        """Текущее число команд в очереди."""
+        with self._lock:
+            return len(self._pending)
+
+    def metrics(self):
+        """Метрики очереди: глубина, размер пачки и задержка выполнения (с)."""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "applied": self.applied,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "last_batch": self.last_batch,
+            "last_latency": self.last_latency,
+            "max_latency": self.max_latency
+        }
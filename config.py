@@ -9,8 +9,33 @@ angle = 45.0
 air_resistance = 0.1
 mode = "slingshot"
 color_effect = False
+renderer = "batch"  # Отрисовка форм: "batch" (пакетная на NumPy) или "debug_draw" (средствами pymunk)
+sprite_cache_size = 4096  # Число сглаженных спрайтов форм в кэше отрисовки (0 — рисовать без спрайтов)
+sprite_angle_step = 5.0  # Шаг округления угла поворота спрайтов, град
+sprite_hue_step = 10.0  # Шаг округления оттенка спрайтов в эффекте цвета, град
 shape_type = "circle"  
 static_mode = False  # когда не выбрана форма кнопки 
+time_scale = 1.0  # Ускорение времени симуляции (0.1–50)
+solver_threads = 1  # Потоки решателя pymunk (только Linux; pymunk использует не больше 2)
+broadphase = "auto"  # Широкая фаза столкновений: "bbtree", "spatial_hash" или "auto"
+trajectory_capacity = 4096  # Наибольшее число точек траектории и кривой скорости пушки
+trajectory_min_distance = 2.0  # Точки траектории ближе этого расстояния (пиксели) пропускаются
+slingshot_preview_time = 2.0  # Длительность предсказанного полёта при натяжении рогатки, с (0 — не показывать)
+
+# Залп пушки
+salvo_count = 1  # Число мячей в залпе (1 — обычный выстрел)
+salvo_angle_spread = 20.0  # Разброс углов залпа, град
+salvo_velocity_spread = 0.0  # Разброс начальных скоростей залпа, м/с
+optimal_angle_cache = "optimal_angle_cache.json"  # Файл кэша оптимальных углов (None — только в памяти)
+
+# Серия выстрелов пушки
+sweep_angle_step = 0.5  # Шаг сетки углов 0–90°, град
+sweep_workers = None  # Число процессов (None — по числу ядер)
+
+# Профилирование кадра
+show_profiler = False  # Оверлей с временем фаз кадра (переключается клавишей F3)
+profiler_export_path = None  # Файл .json или .csv для периодической выгрузки профиля
+profiler_export_interval = 5.0  # Период выгрузки профиля, с
 
 # Конфигурация темы
 theme = "light"  # Начальная тема: светлая
@@ -4,6 +4,8 @@ import pymunk.pygame_util
 import config
 import os
 import math
+import time
+from renderer import HUE_SPEED, Renderer, SpriteCache
 
 
 class Graphics:
@@ -24,6 +26,17 @@ class Graphics:
         pygame.display.set_caption(title)
         self.draw_options = pymunk.pygame_util.DrawOptions(self.screen)
         pymunk.pygame_util.positive_y_is_up = False
+        self.sprites = None
+        self.renderer = Renderer(self.screen)
+        self.profiler_font = None
+        self._profiler_surface = None
+        self._profiler_updated = 0.0
+
+    def set_surface(self, surface):
+        """Отрисовка на другую поверхность (например, внеэкранную в бенчмарке)."""
+        self.screen = surface
+        self.draw_options = pymunk.pygame_util.DrawOptions(surface)
+        self.renderer = Renderer(surface, self.renderer.sprites)
 
     def clear(self):
         """Очистка экрана."""
@@ -31,71 +44,95 @@ class Graphics:
         bg_rgb = tuple(int(bg_hex[i:i+2], 16) for i in (1, 3, 5))
         self.screen.fill(bg_rgb)
 
-    def draw_objects(self, space):
-        """Отрисовка объектов в пространстве."""
-        if config.color_effect:
-            dynamic_shapes = []
-            static_shapes = []
-            default_color = (128, 128, 128, 255)  
-            for body in space.bodies:
-                for shape in body.shapes:
-                    if isinstance(shape, pymunk.Shape):
-                        shape_color = getattr(shape, 'color', default_color)
-                        if body.body_type == pymunk.Body.DYNAMIC:
-                            dynamic_shapes.append((shape, shape_color))
-                            space.remove(shape)
-                        else:
-                            static_shapes.append((shape, shape_color))
-                            space.remove(shape)
+    def draw_objects(self, space, sim_time=0.0, generation=None, poses=None):
+        """Отрисовка объектов в пространстве на момент времени симуляции sim_time.
 
+        generation — PhysicsWorld.shape_generation, по нему пакетный
+        отрисовщик узнаёт о добавлении и удалении форм. poses —
+        интерполированные позы тел (PoseInterpolator.poses); их учитывает
+        только пакетный отрисовщик, остальные рисуют текущие положения.
+        """
+        if config.renderer == "batch":
+            self.renderer.sprites = self._sprite_cache()
+            self.renderer.draw(space, sim_time, config.color_effect, generation, poses)
+        elif config.color_effect:
+            self._draw_color_effect(space, sim_time)
+        else:
             space.debug_draw(self.draw_options)
 
-            for shape, original_color in dynamic_shapes:
-                space.add(shape)
-                shape.color = original_color
-                color = pygame.Color(0)
-                color.hsva = (shape.hue, 90, 100, 100)
+    def _sprite_cache(self):
+        """Кэш спрайтов по текущим настройкам (None, если кэш отключён)."""
+        if config.sprite_cache_size <= 0:
+            self.sprites = None
+        elif self.sprites is None or (self.sprites.capacity, self.sprites.angle_step,
+                                      self.sprites.hue_step) != (
+                config.sprite_cache_size, config.sprite_angle_step, config.sprite_hue_step):
+            self.sprites = SpriteCache(config.sprite_cache_size, config.sprite_angle_step,
+                                       config.sprite_hue_step)
+        return self.sprites
 
-                if isinstance(shape, pymunk.Circle):
-                    pygame.draw.circle(self.screen, color,
-                                       (int(shape.body.position.x), int(shape.body.position.y)),
-                                       int(shape.radius))
-                elif isinstance(shape, pymunk.Poly):
-                    vertices = shape.get_vertices()
-                    body = shape.body
-                    cos_angle = math.cos(body.angle)
-                    sin_angle = math.sin(body.angle)
-                    transformed_vertices = []
-                    for v in vertices:
-                        x = v.x * cos_angle - v.y * sin_angle
-                        y = v.x * sin_angle + v.y * cos_angle
-                        x += body.position.x
-                        y += body.position.y
-                        transformed_vertices.append((x, y))
-                    pygame.draw.polygon(self.screen, color, transformed_vertices)
+    def _draw_color_effect(self, space, sim_time):
+        """Отрисовка с эффектом цвета прямо по состоянию тел и форм.
 
-            for shape, original_color in static_shapes:
-                space.add(shape)
-                shape.color = original_color
-                if isinstance(shape, pymunk.Circle):
-                    pygame.draw.circle(self.screen, original_color,
-                                       (int(shape.body.position.x), int(shape.body.position.y)),
-                                       int(shape.radius))
-                elif isinstance(shape, pymunk.Poly):
-                    vertices = shape.get_vertices()
-                    body = shape.body
-                    cos_angle = math.cos(body.angle)
-                    sin_angle = math.sin(body.angle)
-                    transformed_vertices = []
-                    for v in vertices:
-                        x = v.x * cos_angle - v.y * sin_angle
-                        y = v.x * sin_angle + v.y * cos_angle
-                        x += body.position.x
-                        y += body.position.y
-                        transformed_vertices.append((x, y))
-                    pygame.draw.polygon(self.screen, original_color, transformed_vertices)
-        else:
-            space.debug_draw(self.draw_options)
+        Пространство не изменяется: динамические формы рисуются с оттенком,
+        зависящим от времени, поверх них — статические формы своим цветом,
+        а debug_draw выводит только соединения.
+        """
+        default_color = (128, 128, 128, 255)
+        static_shapes = []
+        color = pygame.Color(0)
+        for shape in space.shapes:
+            body = shape.body
+            if body.body_type != pymunk.Body.DYNAMIC:
+                static_shapes.append(shape)
+                continue
+            hue = (sim_time - getattr(shape, 'hue_time', 0.0)) * HUE_SPEED % 360
+            color.hsva = (hue, 90, 100, 100)
+            self._draw_shape(shape, color)
+        for shape in static_shapes:
+            self._draw_shape(shape, getattr(shape, 'color', default_color))
+        space.debug_draw(self.renderer.constraint_options)
+
+    def _draw_shape(self, shape, color):
+        """Заливка круга или многоугольника цветом color."""
+        body = shape.body
+        if isinstance(shape, pymunk.Circle):
+            position = body.position
+            pygame.draw.circle(self.screen, color, (int(position.x), int(position.y)),
+                               int(shape.radius))
+        elif isinstance(shape, pymunk.Poly):
+            cos_angle = math.cos(body.angle)
+            sin_angle = math.sin(body.angle)
+            x0, y0 = body.position
+            transformed_vertices = [
+                (v.x * cos_angle - v.y * sin_angle + x0, v.x * sin_angle + v.y * cos_angle + y0)
+                for v in shape.get_vertices()
+            ]
+            pygame.draw.polygon(self.screen, color, transformed_vertices)
+
+    def draw_profiler(self, profiler, command_metrics=None, refresh=0.5):
+        """Отрисовка оверлея с перцентилями времени фаз кадра."""
+        now = time.perf_counter()
+        if self._profiler_surface is None or now - self._profiler_updated >= refresh:
+            if self.profiler_font is None:
+                self.profiler_font = pygame.font.SysFont('Consolas,DejaVu Sans Mono,monospace', 14)
+            lines = [f"{'фаза':<13}{'p50':>7}{'p95':>7}{'p99':>7} мс"]
+            for phase, stats in profiler.summary().items():
+                lines.append(f"{phase:<13}{stats['p50']:>7.2f}{stats['p95']:>7.2f}"
+                             f"{stats['p99']:>7.2f}")
+            if command_metrics:
+                lines.append(f"команды: {command_metrics['depth']} в очереди, "
+                             f"{command_metrics['last_latency'] * 1000:.1f} мс")
+            line_height = self.profiler_font.get_linesize()
+            rendered = [self.profiler_font.render(line, True, (255, 255, 255)) for line in lines]
+            width = max(surface.get_width() for surface in rendered) + 12
+            surface = pygame.Surface((width, line_height * len(rendered) + 12), pygame.SRCALPHA)
+            surface.fill((0, 0, 0, 170))
+            for i, text in enumerate(rendered):
+                surface.blit(text, (6, 6 + i * line_height))
+            self._profiler_surface = surface
+            self._profiler_updated = now
+        self.screen.blit(self._profiler_surface, (10, 10))
 
     def update(self):
         """Обновление экрана."""
@@ -0,0 +1,278 @@
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import pymunk
+from physics_world import PhysicsWorld
+import config
+
+# Параметры мира, которые передаются процессам серии выстрелов явно:
+# при запуске через spawn процессы видят config по умолчанию.
+SWEEP_SETTINGS = ("mass", "radius", "elasticity", "friction", "gravity", "air_resistance")
+# Значения, общие для всех выстрелов серии: каждый выстрел — один мяч,
+# даже если в интерфейсе включён залп
+SWEEP_FIXED_SETTINGS = {"salvo_count": 1}
+
+
+@contextmanager
+def config_overrides(settings):
+    """Временная подмена значений config на время прогона."""
+    settings = settings or {}
+    previous = {}
+    for name, value in settings.items():
+        if not hasattr(config, name):
+            raise ValueError(f"Неизвестный параметр конфигурации: {name}")
+        previous[name] = getattr(config, name)
+        setattr(config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(config, name, value)
+
+
+def load_scene(path):
+    """Загрузка описания сцены из JSON-файла."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_scene(physics, scene):
+    """Добавление в мир объектов, перечисленных в описании сцены."""
+    objects = scene.get("objects", [])
+    if not objects:
+        return
+    physics.add_shapes(
+        [obj.get("type", "circle") for obj in objects],
+        [tuple(obj["pos"]) for obj in objects],
+        [obj.get("radius", config.radius) for obj in objects],
+        [obj.get("mass", config.mass) for obj in objects],
+        elasticity=[obj.get("elasticity", config.elasticity) for obj in objects],
+        friction=[obj.get("friction", config.friction) for obj in objects]
+    )
+
+
+def _body_states(physics):
+    """Состояние всех нестатических тел мира."""
+    states = []
+    for body in physics.space.bodies:
+        if body.body_type == pymunk.Body.STATIC:
+            continue
+        states.append({
+            "x": body.position.x,
+            "y": body.position.y,
+            "angle": body.angle,
+            "vx": body.velocity.x,
+            "vy": body.velocity.y
+        })
+    return states
+
+
+def run_headless(scene=None, mode=None, dt=1 / 60, max_time=10.0, settings=None,
+                 width=1200, height=800, sample_every=1, state=None):
+    """Прогон симуляции без окна и интерфейса с фиксированным шагом dt.
+
+    scene — описание сцены (объекты, настройки и запуск), mode — "cannon",
+    "slingshot" или None (только объекты сцены). state — файл состояния
+    мира (PhysicsWorld.save_state), который загружается до объектов сцены.
+    Возвращает словарь с результатами, пригодный для записи в JSON.
+    """
+    scene = scene or {}
+    launch = dict(scene.get("launch", {}))
+    mode = mode or launch.get("mode")
+    merged_settings = dict(scene.get("settings", {}))
+    merged_settings.update(settings or {})
+    if mode in ("cannon", "slingshot"):
+        merged_settings.setdefault("mode", mode)
+
+    with config_overrides(merged_settings):
+        physics = PhysicsWorld(width, height)
+        if state is not None:
+            physics.load_state(state)
+        build_scene(physics, scene)
+
+        projectile = None
+        if mode == "cannon":
+            projectile = physics.cannon.load_ball()
+            physics.cannon.fire()
+        elif mode == "slingshot":
+            pos = launch.get("pos", (width / 4, height / 2))
+            pull = launch.get("pull", (-100, 50))
+            projectile = physics.slingshot.launch(pos, pull)
+        elif mode is not None:
+            raise ValueError(f"Неизвестный режим: {mode}")
+
+        max_steps = int(math.ceil(max_time / dt))
+        samples = []
+        steps = 0
+        while steps < max_steps:
+            physics.update(dt)
+            if mode == "cannon":
+                physics.cannon.update()
+            steps += 1
+            if projectile is not None and steps % sample_every == 0:
+                body = projectile.body
+                samples.append((steps * dt, body.position.x, body.position.y,
+                                body.velocity.x, body.velocity.y))
+            if mode == "cannon" and not physics.cannon.fired and not physics.cannon.salvo.active:
+                break
+
+        result = {
+            "mode": mode,
+            "dt": dt,
+            "steps": steps,
+            "time": steps * dt,
+            "settings": {name: getattr(config, name) for name in merged_settings},
+            "samples": samples,
+            "bodies": _body_states(physics)
+        }
+        if mode == "cannon":
+            cannon = physics.cannon
+            result["angle"] = config.angle
+            result["velocity"] = config.initial_velocity / 100
+            result["range"] = cannon.range_data[-1][1] if cannon.range_data else None
+            result["flight_time"] = cannon.flight_time if not cannon.fired else None
+            result["trajectory"] = list(cannon.trajectory_points)
+            result["velocity_points"] = list(cannon.velocity_points)
+            if len(cannon.salvo):
+                result["salvo"] = [
+                    {"angle": angle, "velocity": velocity, "range": range_m}
+                    for angle, velocity, range_m in zip(cannon.salvo.angles.tolist(),
+                                                        cannon.salvo.velocities.tolist(),
+                                                        cannon.salvo.ranges.tolist())
+                ]
+    return result
+
+
+def run_cannon_batch(angles, velocities, scene=None, dt=1 / 60, max_time=10.0, settings=None,
+                     state=None):
+    """Серия выстрелов пушки для всех сочетаний углов и скоростей (м/с)."""
+    results = []
+    for velocity in velocities:
+        for angle in angles:
+            shot_settings = dict(settings or {})
+            shot_settings.update(angle=angle, initial_velocity=velocity * 100)
+            results.append(run_headless(scene=scene, mode="cannon", dt=dt,
+                                        max_time=max_time, settings=shot_settings,
+                                        state=state))
+    return results
+
+
+def sweep_angles(start=0.0, stop=90.0, step=None):
+    """Сетка углов от start до stop включительно с шагом step (град)."""
+    step = config.sweep_angle_step if step is None else step
+    if step <= 0:
+        raise ValueError("Шаг углов должен быть положительным")
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    return [round(start + i * step, 6) for i in range(count)]
+
+
+def _sweep_chunk(shots, scene, dt, max_time, settings, state):
+    """Прогон части серии выстрелов (выполняется в процессе пула)."""
+    results = []
+    for angle, velocity in shots:
+        shot_settings = dict(settings)
+        shot_settings.update(angle=angle, initial_velocity=velocity * 100)
+        result = run_headless(scene=scene, mode="cannon", dt=dt, max_time=max_time,
+                              settings=shot_settings, state=state)
+        # Состояние тел и выборки не нужны серии и только замедляют передачу
+        del result["bodies"], result["samples"]
+        results.append(result)
+    return results
+
+
+def sweep_cannon(angles, velocities, workers=None, chunk_size=None, scene=None,
+                 dt=1 / 60, max_time=10.0, settings=None, state=None, isolated=False):
+    """Серия выстрелов пушки по сетке углов и скоростей (м/с) в пуле процессов.
+
+    Выстрелы делятся на части по chunk_size и распределяются по workers
+    процессам (по умолчанию config.sweep_workers или число ядер). Текущие
+    параметры мира из config (SWEEP_SETTINGS) передаются каждому выстрелу,
+    settings дополняет их, а SWEEP_FIXED_SETTINGS задаются всегда.
+    Результаты возвращаются в порядке выстрелов: скорости во внешнем цикле,
+    углы во внутреннем.
+
+    При одном процессе серия считается прямо в вызывающем потоке, и на время
+    каждого выстрела config_overrides подменяет глобальный config. Из
+    приложения, где config читают другие потоки, вызывайте с isolated=True:
+    тогда даже один процесс запускается отдельно от вызывающего.
+    """
+    merged_settings = {name: getattr(config, name) for name in SWEEP_SETTINGS}
+    merged_settings.update(settings or {})
+    merged_settings.update(SWEEP_FIXED_SETTINGS)
+    shots = [(angle, velocity) for velocity in velocities for angle in angles]
+    workers = workers or config.sweep_workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(shots)))
+    if workers <= 1 and not isolated:
+        return _sweep_chunk(shots, scene, dt, max_time, merged_settings, state)
+
+    # Несколько частей на процесс выравнивают нагрузку: высокие углы летят дольше
+    chunk_size = chunk_size or max(1, math.ceil(len(shots) / (workers * 4)))
+    chunks = [shots[i:i + chunk_size] for i in range(0, len(shots), chunk_size)]
+    # spawn вместо fork: процесс интерфейса многопоточный (Tk, Pygame)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(_sweep_chunk, chunk, scene, dt, max_time, merged_settings, state)
+                   for chunk in chunks]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def write_results(results, path):
+    """Запись результатов в JSON или, для расширения .csv, в сводную таблицу."""
+    if path.endswith(".csv"):
+        fields = ["mode", "angle", "velocity", "range", "flight_time", "steps", "time"]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False)
+
+
+def main(argv=None):
+    """Точка входа командной строки для пакетного прогона."""
+    parser = argparse.ArgumentParser(description="Пакетный прогон симуляции без окна")
+    parser.add_argument("--scene", help="JSON-файл с описанием сцены")
+    parser.add_argument("--state", help="Файл состояния мира (.npz) из PhysicsWorld.save_state")
+    parser.add_argument("--mode", choices=["cannon", "slingshot"], help="Режим запуска")
+    parser.add_argument("--angle", type=float, nargs="+", help="Углы выстрела пушки (град)")
+    parser.add_argument("--velocity", type=float, nargs="+",
+                        help="Начальные скорости пушки (м/с)")
+    parser.add_argument("--sweep", type=float, nargs=3, metavar=("START", "STOP", "STEP"),
+                        help="Серия выстрелов по сетке углов (град) в пуле процессов")
+    parser.add_argument("--workers", type=int, help="Число процессов серии выстрелов")
+    parser.add_argument("--dt", type=float, default=1 / 60, help="Шаг физики (с)")
+    parser.add_argument("--max-time", type=float, default=10.0,
+                        help="Максимальное время симуляции (с)")
+    parser.add_argument("--output", default="results.json",
+                        help="Файл результатов (.json или .csv)")
+    args = parser.parse_args(argv)
+
+    scene = load_scene(args.scene) if args.scene else None
+    if args.sweep:
+        results = sweep_cannon(sweep_angles(*args.sweep),
+                               args.velocity or [config.initial_velocity / 100],
+                               workers=args.workers, scene=scene, dt=args.dt,
+                               max_time=args.max_time, state=args.state)
+    elif args.mode == "cannon" and (args.angle or args.velocity):
+        results = run_cannon_batch(args.angle or [config.angle],
+                                   args.velocity or [config.initial_velocity / 100],
+                                   scene=scene, dt=args.dt, max_time=args.max_time,
+                                   state=args.state)
+    else:
+        results = [run_headless(scene=scene, mode=args.mode, dt=args.dt,
+                                max_time=args.max_time, state=args.state)]
+    write_results(results, args.output)
+    print(f"Записано прогонов: {len(results)} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
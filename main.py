@@ -1,20 +1,31 @@
 import pygame
 import threading
+import time
 from graphics import Graphics
 from ui import SimulationUI
 from physics_world import PhysicsWorld
+from profiler import FrameProfiler
+from timestep import FixedTimestep, PoseInterpolator
 import config
 
 def run_simulation(graphics, physics, running_event):
     """Запуск симуляции физического мира."""
     clock = pygame.time.Clock()
     fps = 60 
-    dt = 1 / fps
+    timestep = FixedTimestep(1 / fps)
+    interpolator = PoseInterpolator()
+    profiler = FrameProfiler()
+    last_time = time.perf_counter()
 
     while running_event.is_set():
+        profiler.start_frame()
+        physics.commands.apply_pending()
+        profiler.lap("commands")
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running_event.clear()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                config.show_profiler = not config.show_profiler
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if config.mode == "slingshot":
                     physics.slingshot.handle_mouse_down(event)
@@ -25,20 +36,42 @@ def run_simulation(graphics, physics, running_event):
                     physics.slingshot.handle_mouse_up(event)
                 elif config.mode == "cannon":
                     physics.cannon.handle_mouse_up(event)
+        profiler.lap("events")
 
-        physics.update(dt)
-        if config.mode == "cannon":
-            physics.cannon.update()
+        now = time.perf_counter()
+        timestep.set_time_scale(config.time_scale)
+        steps = timestep.advance(now - last_time)
+        last_time = now
+        for step in range(steps):
+            if step == steps - 1:
+                interpolator.capture(physics.space)
+            physics.update(timestep.dt)
+            profiler.lap("physics")
+            if config.mode == "cannon":
+                physics.cannon.update()
+                profiler.lap("cannon")
 
         graphics.clear()
-        graphics.draw_objects(physics.space)
+        poses = None
+        if config.renderer == "batch":
+            poses = interpolator.poses(physics.space, timestep.alpha)
+        graphics.draw_objects(physics.space, physics.time, physics.shape_generation, poses)
+        profiler.lap("draw_objects")
         if config.mode == "slingshot":
             physics.slingshot.draw(graphics.screen)
         elif config.mode == "cannon":
             physics.cannon.draw(graphics.screen)
+        if config.show_profiler:
+            graphics.draw_profiler(profiler, physics.commands.metrics())
+        profiler.lap("overlays")
 
         graphics.update()
+        profiler.lap("flip")
         clock.tick(fps)
+        profiler.lap("wait")
+        profiler.end_frame()
+        profiler.maybe_export(config.profiler_export_path, config.profiler_export_interval,
+                              {"commands": physics.commands.metrics()})
 
 
 def main():
@@ -1,22 +1,184 @@
+import gc
+import json
+import sys
 import pymunk
+import pymunk.batch
 import math
+from functools import lru_cache
+import numpy as np
 from slingshot import Slingshot
-from cannon import Cannon
+from cannon import Cannon, GROUND_COLLISION_TYPE
+from commands import CommandQueue
+import trajectory
 import config
 
 
+SHAPE_COLORS = {
+    "circle": (255, 0, 0, 100),  # Красный для кругов
+    "square": (0, 0, 255, 100),  # Синий для квадратов
+    "triangle": (255, 255, 0, 100),  # Желтый для треугольников
+    "button": (0, 255, 0, 100)  # Зеленый для кнопок
+}
+
+
+@lru_cache(maxsize=256)
+def shape_vertices(shape_type, radius):
+    """Вершины многоугольной формы в координатах тела (кэшируются по типу и радиусу)."""
+    side_length = 2 * radius
+    if shape_type == "square":
+        return ((-radius, -radius), (radius, -radius), (radius, radius), (-radius, radius))
+    if shape_type == "triangle":
+        height = (math.sqrt(3) / 2) * side_length
+        return (
+            (0, -height / 3),
+            (-side_length / 2, height * 2 / 3),
+            (side_length / 2, height * 2 / 3)
+        )
+    raise ValueError(f"Форма {shape_type} не является многоугольником")
+
+
+SHAPE_CODES = {"circle": 0, "square": 1, "triangle": 2, "button": 3}
+
+# Строка снимка состояния: id — номер тела, выданный при добавлении в мир
+# (не повторяется, пока существует мир, в отличие от адреса Body.id), size —
+# радиус для кругов и кнопок, длина стороны для квадратов и треугольников.
+SNAPSHOT_DTYPE = np.dtype([
+    ("id", np.uint64),
+    ("type", np.uint8),
+    ("x", np.float64),
+    ("y", np.float64),
+    ("angle", np.float64),
+    ("vx", np.float64),
+    ("vy", np.float64),
+    ("size", np.float64)
+])
+
+# Строка файла состояния мира (см. PhysicsWorld.save_state): radius —
+# радиус, переданный в add_shape, body_type — тип тела pymunk.
+STATE_DTYPE = np.dtype([
+    ("type", np.uint8),
+    ("body_type", np.uint8),
+    ("x", np.float64),
+    ("y", np.float64),
+    ("angle", np.float64),
+    ("vx", np.float64),
+    ("vy", np.float64),
+    ("angular_velocity", np.float64),
+    ("radius", np.float64),
+    ("mass", np.float64),
+    ("elasticity", np.float64),
+    ("friction", np.float64),
+    ("hue_time", np.float64)
+])
+STATE_VERSION = 1
+SHAPE_NAMES = {code: name for name, code in SHAPE_CODES.items()}
+
+SPATIAL_HASH_MIN_BODIES = 1000  # Порог режима "auto", см. benchmark.py --broadphase
+
+
+def _per_object(value, count, name):
+    """Приведение параметра к последовательности длины count."""
+    if isinstance(value, str) or not hasattr(value, "__len__"):
+        return [value] * count
+    if len(value) != count:
+        raise ValueError(f"Длина {name} ({len(value)}) не совпадает с числом форм ({count})")
+    return value
+
+
+def _lookup(sorted_ids, ids):
+    """Индексы ids в отсортированном массиве sorted_ids и маска найденных."""
+    if len(sorted_ids) == 0:
+        return np.zeros(len(ids), dtype=np.intp), np.zeros(len(ids), dtype=bool)
+    index = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+    return index, sorted_ids[index] == ids
+
+
 class PhysicsWorld:
     """Класс для управления физическим миром симуляции."""
 
     def __init__(self, width, height):
         """Инициализация физического мира."""
-        self.space = pymunk.Space()
-        self.space.gravity = (0, config.gravity * 100)  # Гравитация, см/с² 
+        self.space = self._create_space((0, config.gravity * 100))  # Гравитация, см/с² 
         self.width = width
         self.height = height
+        self.time = 0.0  # Накопленное время симуляции, с
+        self.boundaries = []  # Формы границ мира
+        self.shape_generation = 0  # Растёт при каждом изменении набора форм пространства
+        self.objects = {}  # Тела, добавленные через add_shape: тело -> форма
+        self._object_info = {}  # id тела -> (код типа формы, размер, масса, номер) для снимков
+        self._next_number = 1  # Номер следующего добавленного тела (поле id снимка)
+        self._info_arrays = None  # Отсортированные массивы _object_info
+        self._snapshot_buffer = np.zeros(0, dtype=SNAPSHOT_DTYPE)
+        self._previous_snapshot = None
+        self._batch_buffer = pymunk.batch.Buffer()
+        self.broadphase = "bbtree"  # Текущая широкая фаза столкновений
+        self._hash_params = None  # (размер ячейки, число ячеек) пространственного хеша
         self._create_boundaries()
         self.slingshot = Slingshot(self)
         self.cannon = Cannon(self)
+        self.commands = CommandQueue()  # Изменения мира из потока интерфейса
+
+    def _create_space(self, gravity):
+        """Создание пустого пространства с параметрами мира.
+
+        При config.solver_threads > 1 на Linux создаётся многопоточное
+        пространство pymunk (Chipmunk HastySpace). Число потоков применяется
+        при создании пространства, то есть при запуске и очистке поля.
+        """
+        if config.solver_threads > 1 and sys.platform.startswith("linux"):
+            space = pymunk.Space(threaded=True)
+            space.threads = config.solver_threads
+        else:
+            space = pymunk.Space()
+        space.gravity = gravity
+        return space
+
+    def _replace_space(self, keep):
+        """Замена пространства новым с переносом в него объектов keep."""
+        old_space = self.space
+        old_space.remove(*keep)
+        self.space = self._create_space(old_space.gravity)
+        self.space.add(*keep)
+        self.shape_generation += 1
+        self.broadphase = "bbtree"
+        self._hash_params = None
+        self.cannon.attach(self.space)
+
+    def _tune_broadphase(self):
+        """Выбор и подстройка широкой фазы столкновений.
+
+        config.broadphase: "bbtree" — дерево ограничивающих прямоугольников
+        (по умолчанию в pymunk), "spatial_hash" — пространственный хеш,
+        "auto" — хеш при числе тел от SPATIAL_HASH_MIN_BODIES. Параметры хеша
+        пересчитываются при заметном изменении числа тел или config.radius.
+        """
+        count = len(self.objects)
+        if config.broadphase == "spatial_hash":
+            use_hash = True
+        elif config.broadphase == "auto":
+            # Гистерезис, чтобы не перестраивать пространство туда и обратно
+            threshold = SPATIAL_HASH_MIN_BODIES
+            if self.broadphase == "spatial_hash":
+                threshold //= 2
+            use_hash = count >= threshold
+        else:
+            use_hash = False
+
+        if not use_hash:
+            if self.broadphase == "spatial_hash":
+                self._replace_space(self.space.bodies + self.space.shapes)
+            return
+
+        dim = 2 * config.radius  # Размер ячейки порядка размера формы
+        if self._hash_params is not None:
+            current_dim, current_cells = self._hash_params
+            if (current_dim == dim and count * 10 <= current_cells
+                    and count * 40 >= current_cells):
+                return
+        cells = max(1000, count * 20)  # С запасом, чтобы не перестраивать на каждом теле
+        self.space.use_spatial_hash(dim, cells)
+        self.broadphase = "spatial_hash"
+        self._hash_params = (dim, cells)
 
     def _create_boundaries(self):
         """Создание границ физического мира."""
@@ -27,78 +189,339 @@ class PhysicsWorld:
             [(self.width - 5, self.height / 2), (10, self.height)]
         ]
 
-        for pos, size in boundaries:
+        for i, (pos, size) in enumerate(boundaries):
             body = pymunk.Body(body_type=pymunk.Body.STATIC)
             body.position = pos
             shape = pymunk.Poly.create_box(body, size)
             shape.elasticity = 0.4
             shape.friction = 0.5
             shape.color = (128, 128, 128, 255)  # Серый цвет по умолчанию для границ
+            if i == 0:
+                shape.collision_type = GROUND_COLLISION_TYPE  # Нижняя граница — земля
             self.space.add(body, shape)
+            self.boundaries.append(shape)
+        self.shape_generation += 1
 
-    def add_shape(self, shape_type, radius, mass, pos, elasticity=0.9, friction=0.4):
-        """Добавление формы в физический мир."""
+    def _build_shape(self, shape_type, radius, mass, pos, elasticity, friction):
+        """Создание тела и формы без добавления в пространство."""
         if shape_type == "button":
             body = pymunk.Body(body_type=pymunk.Body.STATIC)
         else:
             body = pymunk.Body()
         body.position = pos
-        if shape_type == "circle":
+        if shape_type == "circle" or shape_type == "button":
             shape = pymunk.Circle(body, radius)
-            shape.color = (255, 0, 0, 100)  # Красный для кругов
-        elif shape_type == "square":
-            side_length = 2 * radius
-            shape = pymunk.Poly.create_box(body, (side_length, side_length))
-            shape.color = (0, 0, 255, 100)  # Синий для квадратов
-        elif shape_type == "triangle":
-            side_length = 2 * radius
-            height = (math.sqrt(3) / 2) * side_length
-            vertices = [
-                (0, -height / 3),
-                (-side_length / 2, height * 2 / 3),
-                (side_length / 2, height * 2 / 3)
-            ]
-            shape = pymunk.Poly(body, vertices)
-            shape.color = (255, 255, 0, 100)  # Желтый для треугольников
-        elif shape_type == "button":
-            shape = pymunk.Circle(body, radius)
-            shape.color = (0, 255, 0, 100)  # Зеленый для кнопок
+        elif shape_type == "square" or shape_type == "triangle":
+            shape = pymunk.Poly(body, shape_vertices(shape_type, radius))
         else:
             raise ValueError(f"Неизвестный тип формы: {shape_type}")
+        shape.color = SHAPE_COLORS[shape_type]
         if shape_type != "button":
             shape.mass = mass
-            shape.hue = 0 
+            shape.hue_time = self.time  # Начало отсчёта оттенка для эффекта цвета
         shape.elasticity = elasticity
         shape.friction = friction
+        return body, shape
+
+    def add_shape(self, shape_type, radius, mass, pos, elasticity=0.9, friction=0.4):
+        """Добавление формы в физический мир."""
+        body, shape = self._build_shape(shape_type, radius, mass, pos, elasticity, friction)
         try:
             self.space.add(body, shape)
         except Exception as e:
             print(f"Ошибка при добавлении формы в пространство: {e}")
             return None
+        self._register(shape_type, radius, shape)
         return shape
 
+    def _register(self, shape_type, radius, shape):
+        """Запись формы в реестр объектов мира."""
+        size = radius if shape.__class__ is pymunk.Circle else 2 * radius
+        self.objects[shape.body] = shape
+        self._object_info[shape.body.id] = (SHAPE_CODES[shape_type], size, shape.mass,
+                                            self._next_number)
+        self._next_number += 1
+        self._info_arrays = None
+        self.shape_generation += 1
+
+    def drag_radius(self, body):
+        """Радиус, по которому для тела body считается сопротивление воздуха."""
+        code, size, _, _ = self._object_info.get(body.id, (None, 0.0, 0.0, 0))
+        if code == SHAPE_CODES["circle"] or code == SHAPE_CODES["button"]:
+            return size
+        return size / 2
+
+    def remove_shape(self, shape):
+        """Удаление формы и её тела из мира и реестра."""
+        self.space.remove(shape.body, shape)
+        self.shape_generation += 1
+        if self.objects.pop(shape.body, None) is not None:
+            self._object_info.pop(shape.body.id, None)
+            self._info_arrays = None
+
+    def add_shapes(self, shape_types, positions, radii, masses, elasticity=0.9, friction=0.4):
+        """Пакетное добавление форм в физический мир.
+
+        positions — последовательность координат (или массив N×2), остальные
+        параметры — одно значение на все формы или последовательность длины N.
+        Все тела добавляются в пространство одним вызовом. Возвращает список форм.
+        """
+        count = len(positions)
+        shape_types = _per_object(shape_types, count, "shape_types")
+        radii = _per_object(radii, count, "radii")
+        masses = _per_object(masses, count, "masses")
+        elasticity = _per_object(elasticity, count, "elasticity")
+        friction = _per_object(friction, count, "friction")
+
+        shapes = []
+        objects = []
+        # Тела и формы pymunk ссылаются друг на друга, и при создании тысяч
+        # объектов сборщик мусора многократно обходит их впустую.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for i in range(count):
+                body, shape = self._build_shape(shape_types[i], radii[i], masses[i],
+                                                tuple(positions[i]), elasticity[i], friction[i])
+                shapes.append(shape)
+                objects.append(body)
+                objects.append(shape)
+            self.space.add(*objects)
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"Ошибка при добавлении форм в пространство: {e}")
+            return []
+        finally:
+            if gc_enabled:
+                gc.enable()
+        for shape, shape_type, radius in zip(shapes, shape_types, radii):
+            self._register(shape_type, radius, shape)
+        return shapes
+
     def update(self, dt):
         """Обновление физического мира."""
+        self._tune_broadphase()
+        self._apply_drag(dt)
         self.space.step(dt)
-        for body in self.space.bodies:
-            if body.body_type == pymunk.Body.DYNAMIC:
-                for shape in body.shapes:
-                    if isinstance(shape, (pymunk.Circle, pymunk.Poly)):
-                        shape.hue = (shape.hue + 0.5) % 360
+        self.time += dt
+
+    def _apply_drag(self, dt):
+        """Сопротивление воздуха для всех тел одним пакетным проходом NumPy.
+
+        Модель та же, что в trajectory.py: сила -k·|v|·v, где k зависит от
+        config.air_resistance и площади круга радиуса формы. Шаг неявный:
+        сила делится на 1 + k·|v|·dt/m, то есть скорость за шаг умножается
+        на 1/(1 + k·|v|·dt/m) и не меняет знак даже при большом
+        сопротивлении и лёгком теле, когда явный шаг разошёлся бы. Скорости
+        и уже приложенные силы читаются, а новые силы записываются одним
+        вызовом pymunk.batch, без цикла Python по телам.
+        """
+        if config.air_resistance <= 0 or not self.objects:
+            return
+        fields = pymunk.batch.BodyFields.VELOCITY | pymunk.batch.BodyFields.FORCE
+        self._batch_buffer.clear()
+        pymunk.batch.get_space_bodies(self.space, pymunk.batch.BodyFields.BODY_ID | fields,
+                                      self._batch_buffer)
+        ids = np.frombuffer(self._batch_buffer.int_buf(), dtype=np.uintp).astype(np.uint64)
+        values = np.frombuffer(self._batch_buffer.float_buf(), dtype=np.float64).reshape(-1, 4)
+
+        info_ids, info = self._object_arrays()
+        index, registered = _lookup(info_ids, ids)
+        # Размер в реестре — радиус для кругов и кнопок и сторона для многоугольников
+        sizes = info[index, 1]
+        circles = (info[index, 0] == SHAPE_CODES["circle"]) | (info[index, 0] == SHAPE_CODES["button"])
+        radii = np.where(registered, np.where(circles, sizes, sizes / 2), 0.0)
+        masses = np.where(registered, info[index, 2], 0.0)
+
+        k = trajectory.drag_constant(radii, config.air_resistance)
+        vx = values[:, 0]
+        vy = values[:, 1]
+        speed = np.sqrt(vx * vx + vy * vy)
+        # Статические тела и кнопки без массы сила не двигает
+        damping = np.where(masses > 0, k * speed * dt / np.where(masses > 0, masses, 1.0), 0.0)
+        drag = k * speed / (1 + damping)
+        forces = np.empty((len(values), 2))
+        forces[:, 0] = values[:, 2] - drag * vx
+        forces[:, 1] = values[:, 3] - drag * vy
+
+        # Отдельный буфер: set_float_buf подменяет память буфера на массив NumPy
+        buffer = pymunk.batch.Buffer()
+        buffer.set_float_buf(forces)
+        pymunk.batch.set_space_bodies(self.space, pymunk.batch.BodyFields.FORCE, buffer)
 
     def clear_objects(self):
-        """Очистка всех объектов, кроме границ."""
-        boundary_positions = [
-            (self.width / 2, self.height - 5),
-            (self.width / 2, 5),
-            (5, self.height / 2),
-            (self.width - 5, self.height / 2)
-        ]
-        for body in self.space.bodies:
-            if (body.body_type == pymunk.Body.DYNAMIC or
-                    (body.body_type == pymunk.Body.STATIC and
-                     body.position not in boundary_positions)):
-                self.space.remove(body, *body.shapes)
+        """Очистка всех объектов, кроме границ.
+
+        Вместо поштучного удаления тел создаётся новое пространство, в которое
+        переносятся только границы, поэтому очистка не зависит от числа тел.
+        """
+        self._replace_space([obj for shape in self.boundaries for obj in (shape.body, shape)])
+        self.objects = {}
+        self._object_info = {}
+        self._info_arrays = None
+        self._previous_snapshot = None  # Прежние тела не сравниваются с новыми
+
+    def snapshot(self, changed_only=False):
+        """Снимок состояния всех тел, добавленных через add_shape.
+
+        Возвращает структурированный массив NumPy с полями SNAPSHOT_DTYPE.
+        Массив — представление внутреннего буфера, который переиспользуется
+        между вызовами, поэтому данные нужно скопировать, если они нужны
+        после следующего снимка. При changed_only=True возвращаются только
+        тела, которые появились или изменили положение, угол или скорость
+        с предыдущего снимка; тела сопоставляются по полю id (номер тела,
+        см. SNAPSHOT_DTYPE), поэтому новое тело не примут за удалённое, даже
+        если pymunk выдаст ему тот же адрес.
+        """
+        fields = (pymunk.batch.BodyFields.BODY_ID | pymunk.batch.BodyFields.POSITION
+                  | pymunk.batch.BodyFields.ANGLE | pymunk.batch.BodyFields.VELOCITY)
+        self._batch_buffer.clear()
+        pymunk.batch.get_space_bodies(self.space, fields, self._batch_buffer)
+        ids = np.frombuffer(self._batch_buffer.int_buf(), dtype=np.uintp).astype(np.uint64)
+        values = np.frombuffer(self._batch_buffer.float_buf(), dtype=np.float64).reshape(-1, 5)
+
+        info_ids, info = self._object_arrays()
+        index, registered = _lookup(info_ids, ids)
+        values = values[registered]
+        index = index[registered]
+
+        count = len(index)
+        if len(self._snapshot_buffer) < count:
+            self._snapshot_buffer = np.zeros(max(count, 2 * len(self._snapshot_buffer)),
+                                             dtype=SNAPSHOT_DTYPE)
+        result = self._snapshot_buffer[:count]
+        result["id"] = info[index, 3]
+        result["type"] = info[index, 0]
+        result["x"] = values[:, 0]
+        result["y"] = values[:, 1]
+        result["angle"] = values[:, 2]
+        result["vx"] = values[:, 3]
+        result["vy"] = values[:, 4]
+        result["size"] = info[index, 1]
+
+        previous = self._previous_snapshot
+        self._previous_snapshot = result[np.argsort(result["id"])]
+        if not changed_only or previous is None:
+            return result
+        position, known = _lookup(previous["id"], result["id"])
+        before = previous[position]
+        changed = ~known
+        for name in ("x", "y", "angle", "vx", "vy"):
+            changed |= before[name] != result[name]
+        return result[changed]
+
+    def save_state(self, path):
+        """Сохранение полного состояния мира в двоичный файл NumPy (.npz).
+
+        В файл попадают все тела из реестра (форма, материал, положение,
+        скорости, тип тела), размеры мира с границами, гравитация, время
+        симуляции и состояние пушки и рогатки.
+        """
+        shapes = list(self.objects.values())
+        index = {shape: i for i, shape in enumerate(shapes)}
+        state = np.zeros(len(shapes), dtype=STATE_DTYPE)
+        for i, shape in enumerate(shapes):
+            body = shape.body
+            code, size, _, _ = self._object_info[body.id]
+            state[i] = (
+                code, body.body_type, body.position.x, body.position.y, body.angle,
+                body.velocity.x, body.velocity.y, body.angular_velocity,
+                size if shape.__class__ is pymunk.Circle else size / 2,
+                shape.mass, shape.elasticity, shape.friction,
+                getattr(shape, "hue_time", 0.0)
+            )
+        meta = {
+            "version": STATE_VERSION,
+            "width": self.width,
+            "height": self.height,
+            "gravity": tuple(self.space.gravity),
+            "time": self.time,
+            "cannon": self.cannon.get_state(index),
+            "slingshot": self.slingshot.get_state(index)
+        }
+        np.savez(path, bodies=state,
+                 meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8))
+
+    def load_state(self, path):
+        """Восстановление мира из файла, записанного save_state.
+
+        Текущие объекты удаляются (заменой пространства), тела создаются
+        одним пакетом через add_shapes, а углы и скорости записываются одним
+        вызовом pymunk.batch. Возвращает список форм в порядке файла.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            state = data["bodies"]
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+        if meta.get("version") != STATE_VERSION:
+            raise ValueError(f"Неподдерживаемая версия файла состояния: {meta.get('version')}")
+
+        self.cannon.ball = None
+        self.slingshot.shape = None
+        if (meta["width"], meta["height"]) != (self.width, self.height):
+            # Границы другого размера строятся заново в пустом пространстве
+            self.width, self.height = meta["width"], meta["height"]
+            self.boundaries = []
+            self.clear_objects()
+            self._create_boundaries()
+        else:
+            self.clear_objects()
+        self.space.gravity = meta["gravity"]
+        self.time = meta["time"]
+
+        shapes = self.add_shapes(
+            [SHAPE_NAMES[code] for code in state["type"].tolist()],
+            np.column_stack((state["x"], state["y"])).tolist(),
+            state["radius"].tolist(),
+            state["mass"].tolist(),
+            elasticity=state["elasticity"].tolist(),
+            friction=state["friction"].tolist()
+        )
+        for shape, hue_time in zip(shapes, state["hue_time"].tolist()):
+            shape.hue_time = hue_time
+        # Смена типа тела обнуляет скорость, поэтому тип задаётся до скоростей
+        for i in np.flatnonzero(state["body_type"] != pymunk.Body.DYNAMIC).tolist():
+            if shapes[i].body.body_type != state["body_type"][i]:
+                shapes[i].body.body_type = int(state["body_type"][i])
+        self._set_motion(shapes, state)
+
+        self.cannon.set_state(meta["cannon"], shapes)
+        self.slingshot.set_state(meta["slingshot"], shapes)
+        return shapes
+
+    def _set_motion(self, shapes, state):
+        """Запись углов и скоростей тел одним пакетным вызовом pymunk."""
+        fields = (pymunk.batch.BodyFields.ANGLE
+                  | pymunk.batch.BodyFields.VELOCITY | pymunk.batch.BodyFields.ANGULAR_VELOCITY)
+        self._batch_buffer.clear()
+        pymunk.batch.get_space_bodies(self.space, pymunk.batch.BodyFields.BODY_ID | fields,
+                                      self._batch_buffer)
+        ids = np.frombuffer(self._batch_buffer.int_buf(), dtype=np.uintp).astype(np.uint64)
+        values = np.frombuffer(self._batch_buffer.float_buf(), dtype=np.float64).reshape(-1, 4).copy()
+
+        shape_ids = np.fromiter((shape.body.id for shape in shapes), dtype=np.uint64,
+                                count=len(shapes))
+        order = np.argsort(shape_ids)
+        index, found = _lookup(shape_ids[order], ids)
+        rows = order[index[found]]
+        for column, name in enumerate(("angle", "vx", "vy", "angular_velocity")):
+            values[found, column] = state[name][rows]
+
+        # Отдельный буфер: set_float_buf подменяет память буфера на массив NumPy
+        buffer = pymunk.batch.Buffer()
+        buffer.set_float_buf(values)
+        pymunk.batch.set_space_bodies(self.space, fields, buffer)
+
+    def _object_arrays(self):
+        """Отсортированные по id тела массивы кодов типов, размеров, масс и номеров из реестра."""
+        if self._info_arrays is None:
+            info_ids = np.fromiter(self._object_info.keys(), dtype=np.uint64,
+                                   count=len(self._object_info))
+            info = np.array(list(self._object_info.values()),
+                            dtype=np.float64).reshape(-1, 4)
+            order = np.argsort(info_ids)
+            self._info_arrays = (info_ids[order], info[order])
+        return self._info_arrays
 
     def set_gravity(self, gravity):
         """Установка значения гравитации."""
@@ -0,0 +1,69 @@
+import math
+import numpy as np
+
+
+class PointBuffer:
+    """Кольцевой буфер точек (x, y) на массиве NumPy.
+
+    Хранит не больше capacity последних точек; при переполнении старые
+    точки затираются. Если задан min_distance, точка ближе этого расстояния
+    к последней сохранённой пропускается. Итерация отдаёт кортежи (x, y)
+    от старых к новым, как прежний список точек.
+    """
+
+    def __init__(self, capacity=4096, min_distance=0.0):
+        """Инициализация пустого буфера на capacity точек."""
+        self.capacity = max(1, int(capacity))
+        self.min_distance = min_distance
+        self._data = np.zeros((self.capacity, 2), dtype=np.float64)
+        self._start = 0
+        self._count = 0
+        self.max_x = -math.inf  # Максимум x по всем добавленным точкам
+
+    def append(self, x, y, force=False):
+        """Добавление точки; False, если она отброшена прореживанием.
+
+        force=True сохраняет точку независимо от расстояния (например,
+        точку приземления).
+        """
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return False
+        if x > self.max_x:
+            self.max_x = x
+        if self._count and self.min_distance > 0 and not force:
+            last_x, last_y = self._data[(self._start + self._count - 1) % self.capacity]
+            if math.hypot(x - last_x, y - last_y) < self.min_distance:
+                return False
+        if self._count < self.capacity:
+            index = (self._start + self._count) % self.capacity
+            self._count += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._data[index, 0] = x
+        self._data[index, 1] = y
+        return True
+
+    def extend(self, points):
+        """Добавление последовательности точек (без прореживания)."""
+        for x, y in points:
+            self.append(x, y, force=True)
+
+    def clear(self):
+        """Удаление всех точек."""
+        self._start = 0
+        self._count = 0
+        self.max_x = -math.inf
+
+    def array(self):
+        """Точки от старых к новым массивом N×2 (представление, если буфер не заворачивался)."""
+        end = self._start + self._count
+        if end <= self.capacity:
+            return self._data[self._start:end]
+        return np.concatenate((self._data[self._start:], self._data[:end - self.capacity]))
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter([tuple(point) for point in self.array().tolist()])
@@ -0,0 +1,99 @@
+import csv
+import json
+import time
+from collections import deque
+
+
+class FrameProfiler:
+    """Замер времени фаз кадра со скользящими перцентилями.
+
+    Время каждой фазы суммируется за кадр (фаза может встречаться несколько
+    раз, например по одному разу на шаг физики) и после end_frame попадает
+    в скользящее окно последних window кадров.
+    """
+
+    def __init__(self, window=300):
+        """Инициализация профилировщика с окном в window кадров."""
+        self.window = window
+        self.samples = {}
+        self._frame = {}
+        self._last = time.perf_counter()
+        self._last_export = self._last
+
+    def start_frame(self):
+        """Начало нового кадра."""
+        self._frame = {}
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        """Добавление времени, прошедшего с предыдущей отметки, к фазе phase."""
+        now = time.perf_counter()
+        self._frame[phase] = self._frame.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+    def end_frame(self):
+        """Сохранение времён фаз завершённого кадра."""
+        total = 0.0
+        for phase, seconds in self._frame.items():
+            if phase not in self.samples:
+                self.samples[phase] = deque(maxlen=self.window)
+            self.samples[phase].append(seconds * 1000)
+            total += seconds
+        for phase, values in self.samples.items():
+            if phase not in self._frame and phase != "frame":
+                values.append(0.0)  # Фаза в этом кадре не выполнялась
+        if "frame" not in self.samples:
+            self.samples["frame"] = deque(maxlen=self.window)
+        self.samples["frame"].append(total * 1000)
+
+    @staticmethod
+    def _percentile(sorted_values, fraction):
+        """Перцентиль по методу ближайшего ранга."""
+        index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+        return sorted_values[index]
+
+    def summary(self):
+        """Перцентили p50/p95/p99, среднее и максимум по каждой фазе (мс)."""
+        result = {}
+        for phase, values in self.samples.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            result[phase] = {
+                "p50": self._percentile(ordered, 0.50),
+                "p95": self._percentile(ordered, 0.95),
+                "p99": self._percentile(ordered, 0.99),
+                "mean": sum(ordered) / len(ordered),
+                "max": ordered[-1]
+            }
+        return result
+
+    def export(self, path, extra=None):
+        """Запись сводки в JSON или, для расширения .csv, в таблицу."""
+        summary = self.summary()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["phase", "p50", "p95", "p99", "mean", "max"])
+                for phase, stats in summary.items():
+                    writer.writerow([phase, stats["p50"], stats["p95"], stats["p99"],
+                                     stats["mean"], stats["max"]])
+        else:
+            data = {"time": time.time(), "window": self.window, "phases": summary}
+            if extra:
+                data.update(extra)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def maybe_export(self, path, interval, extra=None):
+        """Периодическая выгрузка сводки не чаще раза в interval секунд."""
+        if not path:
+            return
+        now = time.perf_counter()
+        if now - self._last_export < interval:
+            return
+        self._last_export = now
+        try:
+            self.export(path, extra)
+        except OSError as e:
+            print(f"Ошибка при записи профиля: {e}")
@@ -0,0 +1,479 @@
+import math
+from collections import OrderedDict
+import numpy as np
+import pygame
+import pymunk
+import pymunk.batch
+import pymunk.pygame_util
+
+HUE_SPEED = 30.0  # Скорость смены оттенка в эффекте цвета, градусов в секунду
+SUPERSAMPLE = 4  # Во сколько раз крупнее рисуется спрайт перед сглаживающим уменьшением
+
+
+class _ShapeGroup:
+    """Формы одного вида (круги или многоугольники с одинаковым числом вершин).
+
+    Локальные точки форм (центр круга или вершины многоугольника) хранятся
+    одним массивом n×k×2, поэтому перевод в мировые координаты — несколько
+    операций NumPy на всю группу.
+    """
+
+    def __init__(self, shapes, local, options, radii=None):
+        """Кэш форм shapes с локальными точками local (n×k×2)."""
+        self.shapes = shapes
+        self.bodies = [shape.body for shape in shapes]
+        self.ids = np.array([body.id for body in self.bodies], dtype=np.uintp)
+        self.local = local
+        self.radii = radii
+        # Радиус описанной окружности вокруг тела для отсечения невидимых форм
+        bound = np.sqrt((local ** 2).sum(axis=2)).max(axis=1)
+        self.bound = bound + radii if radii is not None else bound
+        self.colors = np.array([_shape_color(shape, options) for shape in shapes], dtype=np.uint8)
+        # Одинаковые по геометрии формы делят спрайты: номер геометрии для каждой формы
+        if radii is not None:
+            geometry = np.round(radii, 2)[:, None]
+            kind = "circle"
+        else:
+            geometry = np.round(local, 2).reshape(len(shapes), -1)
+            kind = "polygon"
+        unique, inverse = np.unique(geometry, axis=0, return_inverse=True)
+        self.geometries = [(kind, tuple(row)) for row in unique.tolist()]
+        self.geometry_ids = inverse.ravel().astype(np.int64)
+        # Период поворотной симметрии, град: квадрат совпадает с собой через 90°
+        self.periods = np.array([_rotation_period(geometry) for geometry in self.geometries])
+        self.hue_times = np.array([getattr(shape, 'hue_time', 0.0) for shape in shapes])
+        self.rows = np.full(len(shapes), -1, dtype=np.intp)  # Строки пакетного снимка тел
+        self.dynamic = np.zeros(len(shapes), dtype=bool)
+        self.refresh_types(np.arange(len(shapes)))
+
+    def refresh_types(self, indices):
+        """Перечитывание типов тел форм с номерами indices."""
+        for i in indices.tolist():
+            self.dynamic[i] = self.bodies[i].body_type == pymunk.Body.DYNAMIC
+
+    def poses(self, values):
+        """Положения (n×2) и углы (n) тел группы по пакетному снимку values."""
+        found = self.rows >= 0
+        pose = values[np.where(found, self.rows, 0)]
+        # Тела вне снимка (например, space.static_body) читаются по одному
+        for i in np.flatnonzero(~found).tolist():
+            body = self.bodies[i]
+            pose[i] = (body.position.x, body.position.y, body.angle)
+        return pose[:, :2], pose[:, 2]
+
+    def world_points(self, indices, positions, angles):
+        """Мировые координаты локальных точек форм с номерами indices (m×k×2)."""
+        local = self.local[indices]
+        cos_angle = np.cos(angles)[:, None]
+        sin_angle = np.sin(angles)[:, None]
+        x = local[:, :, 0]
+        y = local[:, :, 1]
+        points = np.empty_like(local)
+        points[:, :, 0] = x * cos_angle - y * sin_angle + positions[:, 0:1]
+        points[:, :, 1] = x * sin_angle + y * cos_angle + positions[:, 1:2]
+        return points
+
+
+def _shape_color(shape, options):
+    """Цвет заливки формы по правилам debug_draw pymunk (options — DrawOptions)."""
+    if hasattr(shape, 'color'):
+        return tuple(int(c) for c in shape.color) + (255,) * (4 - len(shape.color))
+    if shape.body.body_type == pymunk.Body.STATIC:
+        color = options.shape_static_color
+    elif shape.body.body_type == pymunk.Body.KINEMATIC:
+        color = options.shape_kinematic_color
+    else:
+        color = options.shape_dynamic_color
+    return color.as_int()
+
+
+def _rotation_period(geometry):
+    """Наименьший угол (град), при повороте на который форма совпадает с собой."""
+    kind, values = geometry
+    if kind == "circle":
+        return 360.0
+    vertices = np.array(values).reshape(-1, 2)
+    count = len(vertices)
+    angle = 2 * math.pi / count
+    rotated = vertices @ np.array([[math.cos(angle), math.sin(angle)],
+                                   [-math.sin(angle), math.cos(angle)]])
+    distances = np.hypot(*(rotated[:, None, :] - vertices[None, :, :]).transpose(2, 0, 1))
+    return 360.0 / count if (distances.min(axis=1) < 0.05).all() else 360.0
+
+
+def hue_colors(hues, saturation=0.9, value=1.0):
+    """Цвета RGB (n×3, uint8) для оттенков hues (градусы) как у pygame.Color.hsva."""
+    h = np.asarray(hues, dtype=np.float64) / 60.0
+    sector = np.floor(h).astype(np.intp) % 6
+    f = h - np.floor(h)
+    p = value * (1 - saturation)
+    q = value * (1 - saturation * f)
+    t = value * (1 - saturation * (1 - f))
+    v = np.full_like(f, value)
+    p = np.full_like(f, p)
+    channels = np.stack([
+        np.choose(sector, [v, q, p, p, t, v]),
+        np.choose(sector, [t, v, v, q, p, p]),
+        np.choose(sector, [p, p, t, v, v, q])
+    ], axis=1)
+    return (channels * 255).astype(np.uint8)
+
+
+class SpriteCache:
+    """Кэш заранее отрисованных сглаженных спрайтов форм с вытеснением LRU.
+
+    Ключ спрайта — геометрия формы (тип и размер или вершины), цвет,
+    угол поворота, округлённый до angle_step градусов, и наличие линии
+    угла. Оттенки эффекта цвета округляются до hue_step градусов, чтобы
+    число разных спрайтов оставалось ограниченным. Формы крупнее max_size
+    пикселей (например, границы мира) рисуются напрямую, как и формы, для
+    которых за кадр уже отрисовано max_renders новых спрайтов: кэш
+    наполняется постепенно и не растягивает отдельный кадр.
+    """
+
+    def __init__(self, capacity=4096, angle_step=5.0, hue_step=10.0, max_size=64,
+                 max_renders=256):
+        """Инициализация пустого кэша на capacity спрайтов."""
+        self.capacity = max(1, int(capacity))
+        self.angle_step = max(0.5, angle_step)  # Не больше 720 корзин угла
+        self.hue_step = max(0.1, hue_step)
+        self.max_size = max_size
+        self.max_renders = max_renders
+        self._renders_left = max_renders
+        self._sprites = OrderedDict()
+
+    def __len__(self):
+        return len(self._sprites)
+
+    @property
+    def angle_buckets(self):
+        """Число корзин угла поворота на полный оборот."""
+        return max(1, int(round(360.0 / self.angle_step)))
+
+    def start_frame(self):
+        """Начало кадра: сброс лимита новых спрайтов."""
+        self._renders_left = self.max_renders
+
+    def get(self, key):
+        """Спрайт (поверхность, точка привязки) по ключу.
+
+        При промахе спрайт отрисовывается; None, если лимит кадра исчерпан.
+        """
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            if self._renders_left <= 0:
+                return None
+            self._renders_left -= 1
+            sprite = _render_sprite(*key, angle_step=self.angle_step)
+            self._sprites[key] = sprite
+            if len(self._sprites) > self.capacity:
+                self._sprites.popitem(last=False)
+        else:
+            self._sprites.move_to_end(key)
+        return sprite
+
+    def clear(self):
+        """Удаление всех спрайтов."""
+        self._sprites.clear()
+
+
+def _render_sprite(geometry, color, bucket, outline, angle_step):
+    """Отрисовка сглаженного спрайта формы; возвращает поверхность и точку привязки.
+
+    Форма рисуется в SUPERSAMPLE раз крупнее и уменьшается smoothscale:
+    края получаются сглаженными и корректно прозрачными.
+    """
+    kind, values = geometry
+    angle = math.radians(bucket * angle_step)
+    scale = SUPERSAMPLE
+    if kind == "circle":
+        radius = values[0]
+        half = int(math.ceil(radius)) + 2
+    else:
+        vertices = list(zip(values[0::2], values[1::2]))
+        half = int(math.ceil(max(math.hypot(x, y) for x, y in vertices))) + 2
+    size = 2 * half + 1
+    big = pygame.Surface((size * scale, size * scale), pygame.SRCALPHA)
+    # Центр пикселя привязки — (half + 0.5, half + 0.5) в координатах спрайта
+    center = (half + 0.5) * scale
+    if kind == "circle":
+        pygame.draw.circle(big, color, (center, center), (radius + 0.5) * scale)
+        if outline is not None:
+            edge = (center + radius * scale * math.cos(angle),
+                    center + radius * scale * math.sin(angle))
+            pygame.draw.line(big, outline, (center, center), edge, (2 if radius > 20 else 1) * scale)
+    else:
+        cos_angle = math.cos(angle)
+        sin_angle = math.sin(angle)
+        points = [(center + (x * cos_angle - y * sin_angle) * scale,
+                   center + (x * sin_angle + y * cos_angle) * scale) for x, y in vertices]
+        pygame.draw.polygon(big, color, points)
+    sprite = pygame.transform.smoothscale(big, (size, size))
+    sprite.set_alpha(255, pygame.RLEACCEL)  # Прозрачные строки сжимаются, вывод быстрее
+    return sprite, (half, half)
+
+
+class Renderer:
+    """Пакетная отрисовка форм пространства вместо space.debug_draw.
+
+    Формы раскладываются по группам (круги и многоугольники по числу
+    вершин), локальные точки кэшируются и пересобираются только при
+    изменении набора форм. Положения и углы всех тел читаются одним вызовом
+    pymunk.batch, вершины переводятся в мировые координаты NumPy сразу для
+    всей группы, формы за пределами экрана отбрасываются. С кэшем спрайтов
+    группа выводится одним вызовом Surface.blits, без него на каждую
+    видимую форму остаётся один вызов pygame.draw (у кругов вне эффекта
+    цвета — ещё линия угла поворота, как в debug_draw). Редкие формы
+    (отрезки, скруглённые многоугольники) рисуются средствами DrawOptions.
+    """
+
+    def __init__(self, surface, sprites=None):
+        """Инициализация отрисовщика для поверхности surface.
+
+        sprites — SpriteCache; без него формы растеризуются каждый кадр.
+        """
+        self.surface = surface
+        self.sprites = sprites
+        self.draw_options = pymunk.pygame_util.DrawOptions(surface)
+        self.constraint_options = pymunk.pygame_util.DrawOptions(surface)
+        self.constraint_options.flags = pymunk.SpaceDebugDrawOptions.DRAW_CONSTRAINTS
+        self._buffer = pymunk.batch.Buffer()
+        self._shapes = None
+        self._space = None
+        self._generation = None
+        self._ids = None
+        self._circles = None
+        self._polygons = []
+        self._others = []
+
+    def _rebuild(self, shapes):
+        """Раскладка форм по группам и кэширование локальных точек."""
+        circles = []
+        polygons = {}
+        self._others = []
+        for shape in shapes:
+            if isinstance(shape, pymunk.Circle):
+                circles.append(shape)
+            elif isinstance(shape, pymunk.Poly) and shape.radius == 0:
+                vertices = shape.get_vertices()
+                polygons.setdefault(len(vertices), []).append((shape, vertices))
+            else:
+                self._others.append(shape)
+        self._circles = None
+        if circles:
+            local = np.array([[tuple(shape.offset)] for shape in circles], dtype=np.float64)
+            radii = np.array([shape.radius for shape in circles])
+            self._circles = _ShapeGroup(circles, local, self.draw_options, radii)
+        self._polygons = [
+            _ShapeGroup([shape for shape, _ in items],
+                        np.array([[tuple(v) for v in vertices] for _, vertices in items],
+                                 dtype=np.float64), self.draw_options)
+            for items in polygons.values()
+        ]
+        self._shapes = shapes
+        self._ids = None
+
+    def _groups(self):
+        """Все группы форм."""
+        return ([self._circles] if self._circles is not None else []) + self._polygons
+
+    def _read_bodies(self, space, poses=None):
+        """Снимок положений и углов всех тел пространства одним пакетным вызовом.
+
+        poses — готовый снимок (id тел, массив N×3) в том же формате,
+        например интерполированный PoseInterpolator.poses.
+        """
+        if poses is None:
+            fields = (pymunk.batch.BodyFields.BODY_ID | pymunk.batch.BodyFields.POSITION
+                      | pymunk.batch.BodyFields.ANGLE)
+            self._buffer.clear()
+            pymunk.batch.get_space_bodies(space, fields, self._buffer)
+            ids = np.frombuffer(self._buffer.int_buf(), dtype=np.uintp)
+            values = np.frombuffer(self._buffer.float_buf(), dtype=np.float64).reshape(-1, 3)
+        else:
+            ids, values = poses
+
+        if self._ids is None or not np.array_equal(ids, self._ids):
+            # Порядок тел в снимке меняется при добавлении тел и при переходе
+            # тела в статические, поэтому строки и типы пересчитываются
+            order = np.argsort(ids)
+            sorted_ids = ids[order]
+            for group in self._groups():
+                if len(ids):
+                    index = np.minimum(np.searchsorted(sorted_ids, group.ids), len(ids) - 1)
+                    group.rows = np.where(sorted_ids[index] == group.ids, order[index], -1)
+                else:
+                    group.rows[:] = -1
+                group.refresh_types(np.arange(len(group.shapes)))
+            self._ids = ids.copy()
+        else:
+            # Статическое или кинематическое тело могло стать динамическим
+            for group in self._groups():
+                group.refresh_types(np.flatnonzero(~group.dynamic))
+        return values
+
+    def _visible(self, positions, bound):
+        """Признаки форм, попадающих на поверхность."""
+        width, height = self.surface.get_size()
+        x = positions[:, 0]
+        y = positions[:, 1]
+        return (x + bound >= 0) & (x - bound <= width) & (y + bound >= 0) & (y - bound <= height)
+
+    def draw(self, space, sim_time=0.0, color_effect=False, generation=None, poses=None):
+        """Отрисовка всех форм пространства space.
+
+        color_effect — эффект цвета: динамические формы окрашиваются оттенком,
+        зависящим от времени симуляции sim_time, остальные рисуются своим
+        цветом поверх них. generation — счётчик изменений набора форм
+        (PhysicsWorld.shape_generation): пока он и пространство те же, группы
+        форм не перестраиваются и список space.shapes не запрашивается. Без
+        счётчика список форм сравнивается с прежним каждый кадр. poses —
+        снимок поз тел вместо текущих (см. _read_bodies); тела при этом не
+        изменяются.
+        """
+        if generation is None:
+            shapes = space.shapes
+            if shapes != self._shapes:
+                self._rebuild(shapes)
+        elif space is not self._space or generation != self._generation:
+            self._rebuild(space.shapes)
+        self._space = space
+        self._generation = generation
+        values = self._read_bodies(space, poses)
+        if self.sprites is not None:
+            self.sprites.start_frame()
+
+        batches = []
+        for group in self._groups():
+            positions, angles = group.poses(values)
+            visible = self._visible(positions, group.bound)
+            batches.append((group, positions, angles, visible))
+        # Как в debug_draw: сначала динамические формы, затем статические поверх
+        for dynamic in (True, False):
+            for group, positions, angles, visible in batches:
+                indices = np.flatnonzero(visible & (group.dynamic == dynamic))
+                if len(indices):
+                    self._draw_group(group, indices, positions, angles,
+                                     color_effect and dynamic, color_effect, sim_time)
+        self._draw_others(color_effect)
+        if space.constraints:
+            space.debug_draw(self.constraint_options)
+
+    def _draw_group(self, group, indices, positions, angles, hue, color_effect, sim_time):
+        """Отрисовка форм группы с номерами indices."""
+        if hue:
+            hues = (sim_time - group.hue_times[indices]) * HUE_SPEED % 360
+            if self.sprites is not None:
+                hues = np.floor(hues / self.sprites.hue_step) * self.sprites.hue_step
+            colors = np.empty((len(indices), 4), dtype=np.uint8)
+            colors[:, :3] = hue_colors(hues)
+            colors[:, 3] = 255
+        else:
+            colors = group.colors[indices]
+        points = group.world_points(indices, positions[indices], angles[indices])
+        angles = angles[indices]
+        if self.sprites is not None:
+            small = group.bound[indices] <= self.sprites.max_size
+            if small.any():
+                centers = points[small, 0] if group.radii is not None else positions[indices[small]]
+                drawn = small.copy()
+                drawn[small] = self._blit_sprites(group, indices[small], centers, angles[small],
+                                                  colors[small],
+                                                  group.radii is not None and not color_effect)
+                if drawn.all():
+                    return
+                rest = ~drawn
+                indices, points, angles, colors = indices[rest], points[rest], angles[rest], colors[rest]
+        self._draw_direct(group, indices, points, angles, colors, color_effect)
+
+    def _blit_sprites(self, group, indices, centers, angles, colors, outline):
+        """Отрисовка форм группы спрайтами из кэша одним вызовом Surface.blits.
+
+        Возвращает признаки выведенных форм: для остальных лимит новых
+        спрайтов кадра исчерпан, и они рисуются напрямую.
+        """
+        sprites = self.sprites
+        geometry_ids = group.geometry_ids[indices]
+        if group.radii is not None and not outline:
+            bucket = np.zeros(len(indices), dtype=np.int64)  # Круг без линии не зависит от угла
+        else:
+            period = np.maximum(np.rint(group.periods / sprites.angle_step), 1).astype(np.int64)
+            bucket = np.rint(np.degrees(angles) / sprites.angle_step).astype(np.int64)
+            bucket %= period[geometry_ids]
+        # pygame.draw на экране без альфа-канала рисует цвет непрозрачным, спрайты тоже
+        colors = colors.copy()
+        colors[:, 3] = 255
+        color_code = colors.view(np.uint32).ravel().astype(np.int64)
+        codes = (geometry_ids << 42) | (color_code << 10) | bucket
+        unique, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+
+        outline_color = self.draw_options.shape_outline_color.as_int() if outline else None
+        surfaces = np.empty(len(unique), dtype=object)
+        anchors = np.zeros((len(unique), 2), dtype=np.intp)
+        found = np.ones(len(unique), dtype=bool)
+        for j, i in enumerate(first.tolist()):
+            key = (group.geometries[geometry_ids[i]], tuple(colors[i].tolist()),
+                   int(bucket[i]), outline_color)
+            sprite = sprites.get(key)
+            if sprite is None:
+                found[j] = False
+            else:
+                surfaces[j], anchors[j] = sprite
+        drawn = found[inverse]
+        inverse = inverse[drawn]
+        destinations = np.rint(centers[drawn]).astype(np.intp) - anchors[inverse]
+        self.surface.blits(list(zip(surfaces[inverse].tolist(), destinations.tolist())),
+                           doreturn=False)
+        return drawn
+
+    def _draw_direct(self, group, indices, points, angles, colors, color_effect):
+        """Отрисовка форм группы вызовами pygame.draw."""
+        colors = [tuple(color) for color in colors.tolist()]
+        surface = self.surface
+
+        if group.radii is None:
+            if not color_effect:
+                points = np.rint(points)
+            draw_polygon = pygame.draw.polygon
+            for color, vertices in zip(colors, points.tolist()):
+                draw_polygon(surface, color, vertices)
+            return
+
+        centers = points[:, 0]
+        radii = group.radii[indices]
+        draw_circle = pygame.draw.circle
+        if color_effect:
+            # Как в прежнем эффекте цвета: координаты и радиус отбрасывают дробную часть
+            for color, center, radius in zip(colors, centers.astype(np.intp).tolist(),
+                                             radii.astype(np.intp).tolist()):
+                draw_circle(surface, color, center, radius)
+            return
+        edges = np.empty_like(centers)
+        edges[:, 0] = centers[:, 0] + radii * np.cos(angles)
+        edges[:, 1] = centers[:, 1] + radii * np.sin(angles)
+        outline = self.draw_options.shape_outline_color.as_int()
+        draw_line = pygame.draw.line
+        for color, center, edge, radius, width in zip(
+                colors, np.rint(centers).astype(np.intp).tolist(),
+                np.rint(edges).astype(np.intp).tolist(),
+                np.rint(radii).astype(np.intp).tolist(), np.where(radii > 20, 2, 1).tolist()):
+            draw_circle(surface, color, center, radius)
+            draw_line(surface, outline, center, edge, width)
+
+    def _draw_others(self, color_effect):
+        """Отрисовка редких форм (отрезков и скруглённых многоугольников)."""
+        options = self.draw_options
+        outline = options.shape_outline_color
+        for shape in self._others:
+            body = shape.body
+            color = pymunk.SpaceDebugColor(*_shape_color(shape, options))
+            if isinstance(shape, pymunk.Poly):
+                vertices = [body.local_to_world(v) for v in shape.get_vertices()]
+                if color_effect:
+                    pygame.draw.polygon(self.surface, color.as_int(), vertices)
+                else:
+                    options.draw_polygon(vertices, shape.radius, outline, color)
+            elif isinstance(shape, pymunk.Segment) and not color_effect:
+                options.draw_fat_segment(body.local_to_world(shape.a), body.local_to_world(shape.b),
+                                         shape.radius, outline, color)
@@ -0,0 +1,207 @@
+import numpy as np
+import pygame
+import pymunk
+import pymunk.batch
+import config
+
+SALVO_GROUP = 1  # Группа фильтра столкновений: мячи одного залпа не сталкиваются друг с другом
+
+
+class Salvo:
+    """Залп из нескольких одновременно летящих мячей пушки.
+
+    Данные мячей хранятся структурой массивов NumPy: углы, скорости,
+    признаки приземления, дальности и общий буфер траекторий
+    capacity×N×2, в который на каждом шаге одной операцией записываются
+    положения всех мячей. Положения и скорости читаются из пространства
+    одним вызовом pymunk.batch, поэтому стоимость шага почти не зависит
+    от числа мячей. Траектории длиннее capacity шагов обрезаются, дальность
+    при этом продолжает считаться.
+    """
+
+    def __init__(self, cannon):
+        """Инициализация пустого залпа пушки cannon."""
+        self.cannon = cannon
+        self.physics = cannon.physics
+        self.shapes = []
+        self._index = {}  # Форма -> номер мяча
+        self._buffer = pymunk.batch.Buffer()
+        self._allocate(0)
+
+    def _allocate(self, count):
+        """Создание массивов состояния для count мячей."""
+        capacity = config.trajectory_capacity
+        self.angles = np.zeros(count)
+        self.velocities = np.zeros(count)
+        self.landed = np.ones(count, dtype=bool)
+        self.end_times = np.zeros(count)
+        self.max_x = np.full(count, -np.inf)
+        self.ranges = np.full(count, np.nan)
+        self.lengths = np.zeros(count, dtype=np.intp)  # Число точек траектории каждого мяча
+        self.points = np.zeros((capacity, count, 2))  # Траектории, строка на шаг
+        self.speeds = np.zeros((capacity, count))  # Скорости, м/с
+        self.times = np.zeros(capacity)  # Время от выстрела, с
+        self.rows = 0
+        self.start_time = 0.0
+        self._sorted_ids = np.zeros(0, dtype=np.uint64)
+        self._id_order = np.zeros(0, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.shapes)
+
+    @property
+    def active(self):
+        """Есть ли в залпе мячи в полёте."""
+        return not self.landed.all()
+
+    def fire(self, angles, velocities, collision_type=0):
+        """Выстрел мячами под углами angles (град) со скоростями velocities (м/с)."""
+        self.clear()
+        angles = np.asarray(angles, dtype=np.float64)
+        velocities = np.asarray(velocities, dtype=np.float64)
+        count = len(angles)
+        if count == 0:
+            return []
+        shapes = self.physics.add_shapes(
+            "circle", [(self.cannon.x, self.cannon.y)] * count, config.radius, config.mass,
+            elasticity=config.elasticity, friction=config.friction)
+        theta = np.radians(angles)
+        vx = (velocities * 100 * np.cos(theta)).tolist()
+        vy = (-velocities * 100 * np.sin(theta)).tolist()
+        shape_filter = pymunk.ShapeFilter(group=SALVO_GROUP)
+        for shape, velocity_x, velocity_y in zip(shapes, vx, vy):
+            shape.collision_type = collision_type
+            shape.filter = shape_filter
+            shape.body.velocity = (velocity_x, velocity_y)
+        self._track(shapes, angles, velocities)
+        self.landed[:] = False
+        self.start_time = self.physics.time
+        return shapes
+
+    def _track(self, shapes, angles, velocities):
+        """Начало учёта мячей shapes."""
+        self.shapes = list(shapes)
+        self._index = {shape: i for i, shape in enumerate(self.shapes)}
+        self._allocate(len(self.shapes))
+        self.angles[:] = angles
+        self.velocities[:] = velocities
+        ids = np.fromiter((shape.body.id for shape in self.shapes), dtype=np.uint64,
+                          count=len(self.shapes))
+        self._id_order = np.argsort(ids)
+        self._sorted_ids = ids[self._id_order]
+
+    def update(self):
+        """Запись положений и скоростей мячей и проверка приземления."""
+        if not self.shapes or not self.active:
+            return
+        fields = (pymunk.batch.BodyFields.BODY_ID | pymunk.batch.BodyFields.POSITION
+                  | pymunk.batch.BodyFields.VELOCITY)
+        self._buffer.clear()
+        pymunk.batch.get_space_bodies(self.physics.space, fields, self._buffer)
+        ids = np.frombuffer(self._buffer.int_buf(), dtype=np.uintp).astype(np.uint64)
+        values = np.frombuffer(self._buffer.float_buf(), dtype=np.float64).reshape(-1, 4)
+
+        index = np.minimum(np.searchsorted(self._sorted_ids, ids), len(self._sorted_ids) - 1)
+        found = self._sorted_ids[index] == ids
+        balls = self._id_order[index[found]]
+        state = np.full((len(self.shapes), 4), np.nan)
+        state[balls] = values[found]
+
+        flying = ~self.landed & np.isfinite(state).all(axis=1)
+        self.landed |= ~np.isfinite(state).all(axis=1)  # Потерянные мячи больше не отслеживаются
+        x, y = state[:, 0], state[:, 1]
+        landing = flying & (y >= self.cannon.y)
+        y = np.where(landing, self.cannon.y, y)
+        self.max_x[flying] = np.maximum(self.max_x[flying], x[flying])
+
+        if self.rows < len(self.times):
+            row = self.rows
+            self.points[row, :, 0] = x
+            self.points[row, :, 1] = y
+            self.speeds[row] = np.hypot(state[:, 2], state[:, 3]) / 100
+            self.times[row] = self.physics.time - self.start_time
+            self.lengths[flying] = row + 1
+            self.rows += 1
+        if landing.any():
+            self._land(np.flatnonzero(landing))
+
+    def _land(self, balls):
+        """Завершение полёта мячей с номерами balls и запись дальностей."""
+        self.landed[balls] = True
+        self.end_times[balls] = self.physics.time
+        self.ranges[balls] = (self.max_x[balls] - self.cannon.x) / 100
+        self.cannon.range_data.extend(zip(self.angles[balls].tolist(),
+                                          self.ranges[balls].tolist(),
+                                          self.velocities[balls].tolist()))
+
+    def land_shape(self, shape):
+        """Приземление мяча shape по касанию земли; False, если мяч не из залпа."""
+        ball = self._index.get(shape)
+        if ball is None:
+            return False
+        if not self.landed[ball]:
+            self.max_x[ball] = max(self.max_x[ball], shape.body.position.x)
+            self._land(np.array([ball]))
+        return True
+
+    def draw(self, screen, color=(200, 50, 50)):
+        """Отрисовка траекторий мячей залпа."""
+        for ball, length in enumerate(self.lengths.tolist()):
+            if length > 1:
+                pygame.draw.lines(screen, color, False, self.points[:length, ball].tolist(), 2)
+
+    def clear(self):
+        """Удаление мячей залпа из мира и сброс данных."""
+        for shape in self.shapes:
+            try:
+                self.physics.remove_shape(shape)
+            except Exception:
+                pass
+        self.shapes = []
+        self._index = {}
+        self._allocate(0)
+
+    def get_state(self, index):
+        """Состояние залпа для файла состояния мира (index: форма -> номер тела)."""
+        balls = [index.get(shape) for shape in self.shapes]
+        if None in balls:
+            return None
+        return {
+            "balls": balls,
+            "angles": self.angles.tolist(),
+            "velocities": self.velocities.tolist(),
+            "landed": self.landed.tolist(),
+            "end_times": self.end_times.tolist(),
+            "max_x": self.max_x.tolist(),
+            "ranges": self.ranges.tolist(),
+            "lengths": self.lengths.tolist(),
+            "points": self.points[:self.rows].tolist(),
+            "speeds": self.speeds[:self.rows].tolist(),
+            "times": self.times[:self.rows].tolist(),
+            "start_time": self.start_time
+        }
+
+    def set_state(self, state, shapes, collision_type=0):
+        """Восстановление залпа; shapes — формы в порядке файла."""
+        self.shapes = []
+        self._index = {}
+        self._allocate(0)
+        if not state:
+            return
+        salvo_shapes = [shapes[ball] for ball in state["balls"]]
+        shape_filter = pymunk.ShapeFilter(group=SALVO_GROUP)
+        for shape in salvo_shapes:
+            shape.collision_type = collision_type
+            shape.filter = shape_filter
+        self._track(salvo_shapes, state["angles"], state["velocities"])
+        self.landed[:] = state["landed"]
+        self.end_times[:] = state["end_times"]
+        self.max_x[:] = state["max_x"]
+        self.ranges[:] = state["ranges"]
+        self.lengths[:] = np.minimum(state["lengths"], len(self.times))
+        self.rows = min(len(state["times"]), len(self.times))
+        if self.rows:
+            self.points[:self.rows] = np.asarray(state["points"])[:self.rows]
+            self.speeds[:self.rows] = np.asarray(state["speeds"])[:self.rows]
+            self.times[:self.rows] = state["times"][:self.rows]
+        self.start_time = state["start_time"]
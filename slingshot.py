@@ -1,12 +1,14 @@
 import math
 import pygame
 import pymunk
+import trajectory
 import config
 
 
 class Slingshot:
     """Класс для управления рогаткой в симуляции."""
     MAX_SLINGSHOT_LENGTH = 350.0  # Максимальная длина натяжения рогатки в пикселях
+    PREVIEW_STEP = 2.0  # Шаг округления натяжения для кэша предсказанного полёта, пиксели
 
     def __init__(self, physics):
         """Инициализация рогатки."""
@@ -14,6 +16,8 @@ class Slingshot:
         self.shape = None
         self.pressed_pos = None
         self.is_dragging = False
+        self._preview_key = None
+        self._preview_points = None
 
     def handle_mouse_down(self, event):
         """Обработка нажатия кнопки мыши."""
@@ -73,18 +77,7 @@ class Slingshot:
         mouse_pos = pygame.mouse.get_pos()
         dx = mouse_pos[0] - self.pressed_pos[0]
         dy = mouse_pos[1] - self.pressed_pos[1]
-        distance = math.hypot(dx, dy)
-        if distance > self.MAX_SLINGSHOT_LENGTH:
-            dx = dx * self.MAX_SLINGSHOT_LENGTH / distance
-            dy = dy * self.MAX_SLINGSHOT_LENGTH / distance
-            distance = self.MAX_SLINGSHOT_LENGTH
-        angle = math.atan2(dy, dx)
-        if config.mass < 7:
-            force = distance * 40 * 0.1
-        else:
-            force = distance * 40
-        fx = -math.cos(angle) * force  
-        fy = -math.sin(angle) * force  
+        fx, fy = self.compute_impulse(dx, dy)
         try:
             self.shape.body.body_type = pymunk.Body.DYNAMIC
             self.shape.body.apply_impulse_at_local_point((fx, fy), (0, 0))
@@ -97,17 +90,79 @@ class Slingshot:
             self.is_dragging = False
             self.pressed_pos = None
 
+    def clamp_pull(self, dx, dy):
+        """Ограничение вектора натяжения длиной MAX_SLINGSHOT_LENGTH."""
+        distance = math.hypot(dx, dy)
+        if distance > self.MAX_SLINGSHOT_LENGTH:
+            dx = dx * self.MAX_SLINGSHOT_LENGTH / distance
+            dy = dy * self.MAX_SLINGSHOT_LENGTH / distance
+        return dx, dy
+
+    def compute_impulse(self, dx, dy):
+        """Расчёт импульса запуска по вектору натяжения рогатки."""
+        dx, dy = self.clamp_pull(dx, dy)
+        distance = math.hypot(dx, dy)
+        angle = math.atan2(dy, dx)
+        if config.mass < 7:
+            force = distance * 40 * 0.1
+        else:
+            force = distance * 40
+        return -math.cos(angle) * force, -math.sin(angle) * force
+
+    def preview(self, dx, dy):
+        """Предсказанный путь формы, если отпустить её с натяжением (dx, dy).
+
+        Скорость запуска — импульс compute_impulse, делённый на массу формы,
+        путь считается trajectory.flight_path с сопротивлением воздуха из
+        текущего положения тела — того же, из которого его запустит
+        handle_mouse_up.
+        Натяжение округляется до PREVIEW_STEP, и путь пересчитывается только
+        при изменении округлённого натяжения или параметров мира, поэтому
+        пока рука неподвижна, кадр берёт готовый список точек.
+        """
+        if not self.shape or not self.pressed_pos:
+            return None
+        dx, dy = self.clamp_pull(round(dx / self.PREVIEW_STEP) * self.PREVIEW_STEP,
+                                 round(dy / self.PREVIEW_STEP) * self.PREVIEW_STEP)
+        gravity = self.physics.space.gravity[1]
+        origin = tuple(self.shape.body.position)
+        key = (dx, dy, origin, self.shape, config.mass, config.air_resistance,
+               gravity, config.slingshot_preview_time)
+        if key != self._preview_key:
+            self._preview_key = key
+            self._preview_points = None
+            mass = self.shape.mass
+            if mass > 0:
+                fx, fy = self.compute_impulse(dx, dy)
+                points = trajectory.flight_path(
+                    origin, (fx / mass, fy / mass),
+                    mass=mass, radius=self.physics.drag_radius(self.shape.body),
+                    gravity=gravity / trajectory.PIXELS_PER_METER,
+                    duration=config.slingshot_preview_time, floor=self.physics.height)
+                self._preview_points = points.tolist()
+        return self._preview_points
+
+    def launch(self, pos, pull):
+        """Запуск новой формы из точки pos с натяжением pull без участия мыши."""
+        shape = self.physics.add_shape(
+            shape_type=config.shape_type,
+            radius=config.radius,
+            mass=config.mass,
+            pos=pos,
+            elasticity=config.elasticity,
+            friction=config.friction
+        )
+        if shape and shape.body.body_type == pymunk.Body.DYNAMIC:
+            shape.body.apply_impulse_at_local_point(self.compute_impulse(*pull), (0, 0))
+        return shape
+
     def update(self):
         """Обновление состояния рогатки."""
         if not self.is_dragging or not self.shape:
             return
         mouse_pos = pygame.mouse.get_pos()
-        dx = mouse_pos[0] - self.pressed_pos[0]
-        dy = mouse_pos[1] - self.pressed_pos[1]
-        distance = math.hypot(dx, dy)
-        if distance > self.MAX_SLINGSHOT_LENGTH:
-            dx = dx * self.MAX_SLINGSHOT_LENGTH / distance
-            dy = dy * self.MAX_SLINGSHOT_LENGTH / distance
+        dx, dy = self.clamp_pull(mouse_pos[0] - self.pressed_pos[0],
+                                 mouse_pos[1] - self.pressed_pos[1])
         try:
             self.shape.body.position = (self.pressed_pos[0] + dx, self.pressed_pos[1] + dy)
         except Exception as e:
@@ -115,6 +170,23 @@ class Slingshot:
             self.shape = None
             self.is_dragging = False
 
+    def get_state(self, index):
+        """Состояние рогатки для файла состояния мира.
+
+        index — словарь форма -> номер тела в файле.
+        """
+        return {
+            "shape": index.get(self.shape),
+            "pressed_pos": tuple(self.pressed_pos) if self.pressed_pos else None,
+            "is_dragging": self.is_dragging
+        }
+
+    def set_state(self, state, shapes):
+        """Восстановление состояния рогатки; shapes — формы в порядке файла."""
+        self.shape = shapes[state["shape"]] if state["shape"] is not None else None
+        self.pressed_pos = tuple(state["pressed_pos"]) if state["pressed_pos"] else None
+        self.is_dragging = state["is_dragging"] and self.shape is not None
+
     def draw(self, screen):
         """Отрисовка рогатки на экране."""
         if not self.is_dragging or not self.pressed_pos or not self.shape:
@@ -122,21 +194,24 @@ class Slingshot:
         mouse_pos = pygame.mouse.get_pos()
         dx = mouse_pos[0] - self.pressed_pos[0]
         dy = mouse_pos[1] - self.pressed_pos[1]
-        distance = math.hypot(dx, dy)
-        if distance > self.MAX_SLINGSHOT_LENGTH:
-            dx = dx * self.MAX_SLINGSHOT_LENGTH / distance
-            dy = dy * self.MAX_SLINGSHOT_LENGTH / distance
-            mouse_pos = (self.pressed_pos[0] + dx, self.pressed_pos[1] + dy)
+        if config.slingshot_preview_time > 0:
+            points = self.preview(dx, dy)
+            if points and len(points) > 1:
+                pygame.draw.lines(screen, (150, 150, 150), False, points, 2)
+        dx, dy = self.clamp_pull(dx, dy)
+        mouse_pos = (self.pressed_pos[0] + dx, self.pressed_pos[1] + dy)
         pygame.draw.line(screen, (0, 0, 0), self.pressed_pos, mouse_pos, 2)
 
     def reset(self):
         """Сброс состояния рогатки."""
         if self.shape:
             try:
-                self.physics.space.remove(self.shape.body, self.shape)
+                self.physics.remove_shape(self.shape)
                 print("Сброс рогатки: Форма удалена")
             except Exception as e:
                 print(f"Ошибка при сбросе рогатки: {e}")
             self.shape = None
         self.pressed_pos = None
-        self.is_dragging = False
\ No newline at end of file
+        self.is_dragging = False
+        self._preview_key = None
+        self._preview_points = None
\ No newline at end of file
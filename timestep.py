@@ -0,0 +1,91 @@
+import numpy as np
+import pymunk
+import pymunk.batch
+
+MIN_TIME_SCALE = 0.1
+MAX_TIME_SCALE = 50.0
+
+
+class FixedTimestep:
+    """Накопитель времени для шагов физики фиксированной длины."""
+
+    def __init__(self, dt, max_substeps=64):
+        """Инициализация накопителя с шагом dt (с)."""
+        self.dt = dt
+        self.max_substeps = max_substeps
+        self.accumulator = 0.0
+        self.time_scale = 1.0
+
+    def set_time_scale(self, scale):
+        """Установка ускорения времени в допустимых пределах."""
+        self.time_scale = max(MIN_TIME_SCALE, min(MAX_TIME_SCALE, scale))
+
+    def advance(self, frame_time):
+        """Добавление времени кадра и расчёт числа шагов физики на этот кадр."""
+        self.accumulator += frame_time * self.time_scale
+        steps = int(self.accumulator // self.dt)
+        if steps > self.max_substeps:
+            # Не догоняем отставание бесконечно: лишнее время отбрасывается,
+            # симуляция замедляется, но каждый шаг остаётся длиной dt.
+            steps = self.max_substeps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        """Доля шага, накопленная сверх последнего шага физики (0..1)."""
+        return self.accumulator / self.dt
+
+
+class PoseInterpolator:
+    """Интерполяция положений тел между двумя последними шагами физики.
+
+    Тела pymunk не изменяются: положения и углы читаются одним пакетным
+    вызовом в массивы, а смешанные позы передаются отрисовщику
+    (Renderer.draw, аргумент poses), поэтому результат симуляции не
+    зависит от частоты кадров и ускорения времени.
+    """
+
+    def __init__(self):
+        """Инициализация хранилища предыдущих положений."""
+        self._buffer = pymunk.batch.Buffer()
+        self.previous = None  # (id тел, массив N×3 x, y, угол) до последнего шага
+
+    def _read(self, space):
+        """Id тел и массив N×3 (x, y, угол) всех тел пространства."""
+        fields = (pymunk.batch.BodyFields.BODY_ID | pymunk.batch.BodyFields.POSITION
+                  | pymunk.batch.BodyFields.ANGLE)
+        self._buffer.clear()
+        pymunk.batch.get_space_bodies(space, fields, self._buffer)
+        ids = np.frombuffer(self._buffer.int_buf(), dtype=np.uintp).copy()
+        values = np.frombuffer(self._buffer.float_buf(), dtype=np.float64).reshape(-1, 3).copy()
+        return ids, values
+
+    def capture(self, space):
+        """Запоминание положений тел перед шагом физики."""
+        self.previous = self._read(space)
+
+    def poses(self, space, alpha):
+        """Позы тел на долю alpha между предыдущим и текущим шагом.
+
+        Возвращает (id тел, массив N×3) в порядке пакетного снимка space.
+        Тела, которых не было при capture, берутся в текущем положении.
+        """
+        ids, values = self._read(space)
+        if self.previous is None:
+            return ids, values
+        previous_ids, previous_values = self.previous
+        if np.array_equal(ids, previous_ids):
+            before = previous_values
+        else:
+            # Порядок тел меняется при добавлении тел и смене типа тела
+            before = values.copy()
+            if len(previous_ids):
+                order = np.argsort(previous_ids)
+                sorted_ids = previous_ids[order]
+                index = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+                found = sorted_ids[index] == ids
+                before[found] = previous_values[order[index[found]]]
+        return ids, before + (values - before) * alpha
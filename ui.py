@@ -1,10 +1,14 @@
+import queue
+import threading
 import customtkinter as ctk
 import config
+from headless import sweep_angles, sweep_cannon
 from visualization import plot_velocity_vs_time, plot_range_vs_angle
 
 
 class SimulationUI:
     """Класс для управления пользовательским интерфейсом симуляции."""
+    BACKGROUND_POLL_MS = 100  # Период проверки результатов фоновых потоков, мс
 
     def __init__(self, physics, running_event, sim_thread):
         """Инициализация интерфейса."""
@@ -27,11 +31,18 @@ class SimulationUI:
         self.velocity_var = ctk.DoubleVar(value=config.initial_velocity / 100)
         self.angle_var = ctk.DoubleVar(value=config.angle)
         self.air_resistance_var = ctk.DoubleVar(value=config.air_resistance)
+        self.time_scale_var = ctk.DoubleVar(value=config.time_scale)
+        self.salvo_var = ctk.DoubleVar(value=config.salvo_count)
 
         self._is_switching_mode = False
+        self._sweep_thread = None  # Фоновая серия выстрелов пушки
+        self._optimal_thread = None  # Фоновый поиск оптимального угла
+        # Результаты фоновых потоков: (функция, аргументы) для вызова в потоке Tk
+        self._background_results = queue.Queue()
 
         self._create_widgets()
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
+        self.root.after(self.BACKGROUND_POLL_MS, self._poll_background)
 
     def _get_theme_color(self, key):
         """Получение цвета темы."""
@@ -47,7 +58,7 @@ class SimulationUI:
     def _setup_window_geometry(self):
         """Настройка геометрии окна."""
         window_width = 500
-        window_height = 600
+        window_height = 730
         pygame_width = 1200
         pygame_height = 800
         screen_width = self.root.winfo_screenwidth()
@@ -125,10 +136,14 @@ class SimulationUI:
             plot_fg = very_light_fg_color
             plot_cmd = None
             range_cmd = None
+            sweep_cmd = None
+            optimal_cmd = None
         else:
             plot_fg = default_button_fg
             plot_cmd = lambda: plot_velocity_vs_time(self.physics.cannon)
             range_cmd = lambda: plot_range_vs_angle(self.physics.cannon)
+            sweep_cmd = self.run_sweep
+            optimal_cmd = self.set_optimal_angle
 
         velocity_current_fg = normalize_color(self.velocity_plot_button.cget("fg_color"))
         velocity_current_cmd = self.velocity_plot_button.cget("command")
@@ -146,6 +161,16 @@ class SimulationUI:
            (config.mode == "cannon" and range_current_cmd != range_cmd):
             self.range_plot_button.configure(command=range_cmd)
 
+        if normalize_color(self.sweep_button.cget("fg_color")) != normalize_color(plot_fg):
+            self.sweep_button.configure(fg_color=plot_fg)
+        if self.sweep_button.cget("command") != sweep_cmd:
+            self.sweep_button.configure(command=sweep_cmd)
+
+        if normalize_color(self.optimal_button.cget("fg_color")) != normalize_color(plot_fg):
+            self.optimal_button.configure(fg_color=plot_fg)
+        if self.optimal_button.cget("command") != optimal_cmd:
+            self.optimal_button.configure(command=optimal_cmd)
+
     def _update_ui_state(self):
         """Обновление состояния пользовательского интерфейса."""
         if self._is_switching_mode:
@@ -304,6 +329,10 @@ class SimulationUI:
                 value = max(0, min(90, value))
             elif var == self.air_resistance_var:
                 value = max(0, min(50, value))
+            elif var == self.time_scale_var:
+                value = max(0.1, min(50, value))
+            elif var == self.salvo_var:
+                value = round(max(1, min(200, value)))
             var.set(round(value, precision))
             entry.delete(0, ctk.END)
             entry.insert(0, str(var.get()))
@@ -322,6 +351,8 @@ class SimulationUI:
         config.initial_velocity = 500.0
         config.angle = 45.0
         config.air_resistance = 0.1
+        config.time_scale = 1.0
+        config.salvo_count = 1
 
         # Обновление переменных
         self.mass_var.set(config.mass)
@@ -332,6 +363,8 @@ class SimulationUI:
         self.velocity_var.set(config.initial_velocity / 100)
         self.angle_var.set(config.angle)
         self.air_resistance_var.set(config.air_resistance)
+        self.time_scale_var.set(config.time_scale)
+        self.salvo_var.set(config.salvo_count)
 
         # Обновление полей ввода
         self.mass_entry.delete(0, ctk.END)
@@ -350,11 +383,15 @@ class SimulationUI:
         self.angle_entry.insert(0, str(config.angle))
         self.air_resistance_entry.delete(0, ctk.END)
         self.air_resistance_entry.insert(0, str(config.air_resistance))
+        self.time_scale_entry.delete(0, ctk.END)
+        self.time_scale_entry.insert(0, str(config.time_scale))
+        self.salvo_entry.delete(0, ctk.END)
+        self.salvo_entry.insert(0, str(config.salvo_count))
 
-        # Обновление физики
-        self.physics.set_gravity(config.gravity * 100)
-        self.physics.slingshot.reset()
-        self.physics.cannon.reset()
+        # Обновление физики (выполняется потоком симуляции)
+        self.physics.commands.submit(self.physics.set_gravity, config.gravity * 100,
+                                     key="gravity")
+        self._reset_launchers()
 
         # Обновление кнопок построения графиков для текущего режима
         self._update_plot_buttons()
@@ -500,6 +537,36 @@ class SimulationUI:
         self.air_resistance_entry.bind("<Return>", lambda e: self._safe_set_var(
             self.air_resistance_var, self.air_resistance_entry))
 
+        self.time_scale_frame = ctk.CTkFrame(self.root, fg_color=self._get_theme_color("bg"))
+        self.time_scale_frame.pack(fill="x", padx=10, pady=5)
+        ctk.CTkLabel(self.time_scale_frame, text="Ускорение времени:", width=150, anchor="w",
+                     text_color=self._get_theme_color("fg")).pack(side="left", padx=5)
+        self.time_scale_slider = ctk.CTkSlider(self.time_scale_frame, from_=0.1, to=50,
+                                               variable=self.time_scale_var,
+                                               command=self.update_time_scale, width=200)
+        self.time_scale_slider.pack(side="left", padx=5)
+        self.time_scale_entry = ctk.CTkEntry(self.time_scale_frame, width=80,
+                                             text_color=self._get_theme_color("fg"))
+        self.time_scale_entry.insert(0, str(self.time_scale_var.get()))
+        self.time_scale_entry.pack(side="left", padx=5)
+        self.time_scale_entry.bind("<Return>", lambda e: self._safe_set_var(
+            self.time_scale_var, self.time_scale_entry))
+
+        self.salvo_frame = ctk.CTkFrame(self.root, fg_color=self._get_theme_color("bg"))
+        self.salvo_frame.pack(fill="x", padx=10, pady=5)
+        ctk.CTkLabel(self.salvo_frame, text="Мячей в залпе:", width=150, anchor="w",
+                     text_color=self._get_theme_color("fg")).pack(side="left", padx=5)
+        self.salvo_slider = ctk.CTkSlider(self.salvo_frame, from_=1, to=200, number_of_steps=199,
+                                          variable=self.salvo_var,
+                                          command=self.update_salvo_count, width=200)
+        self.salvo_slider.pack(side="left", padx=5)
+        self.salvo_entry = ctk.CTkEntry(self.salvo_frame, width=80,
+                                        text_color=self._get_theme_color("fg"))
+        self.salvo_entry.insert(0, str(config.salvo_count))
+        self.salvo_entry.pack(side="left", padx=5)
+        self.salvo_entry.bind("<Return>", lambda e: self._safe_set_var(
+            self.salvo_var, self.salvo_entry))
+
         self.mode_button_frame = ctk.CTkFrame(self.root, fg_color=self._get_theme_color("bg"))
         self.mode_button_frame.pack(pady=10, padx=(20, 0))
         self.slingshot_button = ctk.CTkButton(self.mode_button_frame, text="Рогатка",
@@ -553,6 +620,19 @@ class SimulationUI:
             self.plot_button_frame, text="График дальности",
             command=lambda: plot_range_vs_angle(self.physics.cannon), width=120)
         self.range_plot_button.pack(side="left", padx=5)
+        self.sweep_button = ctk.CTkButton(
+            self.plot_button_frame, text="Серия выстрелов",
+            command=self.run_sweep, width=120)
+        self.sweep_button.pack(side="left", padx=5)
+
+        self.optimal_frame = ctk.CTkFrame(self.root, fg_color=self._get_theme_color("bg"))
+        self.optimal_frame.pack(pady=(0, 10), padx=10)
+        self.optimal_button = ctk.CTkButton(self.optimal_frame, text="Лучший угол",
+                                            command=self.set_optimal_angle, width=120)
+        self.optimal_button.pack(side="left", padx=5)
+        self.optimal_label = ctk.CTkLabel(self.optimal_frame, text="", width=250, anchor="w",
+                                          text_color=self._get_theme_color("fg"))
+        self.optimal_label.pack(side="left", padx=5)
 
         self._update_shape_button_commands()
         self._update_ui_state()
@@ -578,7 +658,8 @@ class SimulationUI:
 
         for frame in [self.mass_frame, self.radius_frame, self.elasticity_frame,
                       self.friction_frame, self.gravity_frame, self.velocity_frame,
-                      self.angle_frame, self.air_resistance_frame]:
+                      self.angle_frame, self.air_resistance_frame, self.time_scale_frame,
+                      self.salvo_frame]:
             frame.configure(fg_color=self._get_theme_color("bg"))
             children = frame.winfo_children()
             if len(children) >= 3:
@@ -592,6 +673,8 @@ class SimulationUI:
         self.shape_button_frame.configure(fg_color=self._get_theme_color("bg"))
         self.plot_button_frame.configure(fg_color=self._get_theme_color("bg"))
         self.clear_button_frame.configure(fg_color=self._get_theme_color("bg"))
+        self.optimal_frame.configure(fg_color=self._get_theme_color("bg"))
+        self.optimal_label.configure(text_color=self._get_theme_color("fg"))
 
         self.theme_switch.configure(
             text="Тема: Светлая" if config.theme == "light" else "Тема: Тёмная")
@@ -601,7 +684,8 @@ class SimulationUI:
         """Обновление значения гравитации."""
         gravity_ms2 = round(float(value), 2)  # Гравитация в м/с²
         gravity_cm2 = gravity_ms2 * 100       # Гравитация в см/с²
-        self.physics.set_gravity(gravity_cm2) # Установка гравитации в физическом мире, см/с²
+        self.physics.commands.submit(self.physics.set_gravity, gravity_cm2,
+                                     key="gravity")  # Гравитация в физическом мире, см/с²
         self.gravity_entry.delete(0, ctk.END)
         self.gravity_entry.insert(0, str(gravity_ms2))
         config.gravity = gravity_ms2
@@ -679,17 +763,105 @@ class SimulationUI:
         self.air_resistance_entry.delete(0, ctk.END)
         self.air_resistance_entry.insert(0, str(config.air_resistance))
 
+    def update_time_scale(self, value):
+        """Обновление ускорения времени симуляции."""
+        config.time_scale = round(float(value), 2)
+        self.time_scale_entry.delete(0, ctk.END)
+        self.time_scale_entry.insert(0, str(config.time_scale))
+
+    def run_sweep(self):
+        """Запуск серии выстрелов по углам 0–90° с текущей скоростью в фоне."""
+        if config.mode != "cannon" or self._sweep_thread is not None:
+            return
+        self.sweep_button.configure(state="disabled", text="Расчёт...")
+        self._sweep_thread = threading.Thread(target=self._sweep_worker,
+                                              args=(config.initial_velocity / 100,),
+                                              daemon=True)
+        self._sweep_thread.start()
+
+    def _sweep_worker(self, velocity):
+        """Расчёт серии в пуле процессов и передача результатов пушке."""
+        try:
+            # Отдельный процесс даже при одном ядре: прогон в этом потоке
+            # подменял бы config, который читают Tk и поток симуляции
+            results = sweep_cannon(sweep_angles(), [velocity], isolated=True)
+            self.physics.commands.submit(self.physics.cannon.merge_sweep, results)
+        except Exception as e:
+            print(f"Ошибка при серии выстрелов: {e}")
+        finally:
+            self._background_results.put((self._finish_sweep, ()))
+
+    def _finish_sweep(self):
+        """Завершение серии выстрелов в потоке Tk."""
+        self._sweep_thread = None
+        self.sweep_button.configure(state="normal", text="Серия выстрелов")
+
+    def _poll_background(self):
+        """Выполнение в потоке Tk результатов, переданных фоновыми потоками."""
+        try:
+            while True:
+                callback, args = self._background_results.get_nowait()
+                try:
+                    callback(*args)
+                except Exception as e:
+                    print(f"Ошибка при обработке фонового результата: {e}")
+        except queue.Empty:
+            pass
+        self.root.after(self.BACKGROUND_POLL_MS, self._poll_background)
+
+    def update_salvo_count(self, value):
+        """Обновление числа мячей в залпе пушки."""
+        config.salvo_count = int(round(float(value)))
+        self.salvo_entry.delete(0, ctk.END)
+        self.salvo_entry.insert(0, str(config.salvo_count))
+
+    def set_optimal_angle(self):
+        """Поиск угла наибольшей дальности для текущих параметров в фоне."""
+        if config.mode != "cannon" or self._optimal_thread is not None:
+            return
+        self.optimal_button.configure(state="disabled")
+        self.optimal_label.configure(text="Расчёт...")
+        self._optimal_thread = threading.Thread(target=self._optimal_worker, daemon=True)
+        self._optimal_thread.start()
+
+    def _optimal_worker(self):
+        """Поиск оптимального угла и передача результата потоку Tk."""
+        try:
+            result = self.physics.cannon.find_optimal_angle()
+        except Exception as e:
+            print(f"Ошибка при поиске оптимального угла: {e}")
+            result = None
+        self._background_results.put((self._apply_optimal_angle, (result,)))
+
+    def _apply_optimal_angle(self, result):
+        """Установка найденного угла в потоке Tk."""
+        self._optimal_thread = None
+        self.optimal_button.configure(state="normal")
+        if result is None:
+            self.optimal_label.configure(text="")
+            return
+        angle, range_m = result
+        config.angle = round(angle, 3)
+        self.angle_var.set(config.angle)
+        self.angle_entry.delete(0, ctk.END)
+        self.angle_entry.insert(0, str(config.angle))
+        self.optimal_label.configure(text=f"{config.angle}°, дальность {range_m:.2f} м")
+
     def clear_objects(self):
         """Очистка объектов в физическом мире."""
-        self.physics.clear_objects()
+        self.physics.commands.submit(self.physics.clear_objects)
+
+    def _reset_launchers(self):
+        """Сброс рогатки и пушки в потоке симуляции."""
+        self.physics.commands.submit(self.physics.slingshot.reset)
+        self.physics.commands.submit(self.physics.cannon.reset)
 
     def set_slingshot_mode(self):
         """Установка режима рогатки."""
         if config.mode == "slingshot":
             return
         config.mode = "slingshot"
-        self.physics.slingshot.reset()
-        self.physics.cannon.reset()
+        self._reset_launchers()
         self.clear_objects()
         self._update_shape_button_commands()
         self._update_ui_state()
@@ -699,8 +871,7 @@ class SimulationUI:
         if config.mode == "cannon":
             return
         config.mode = "cannon"
-        self.physics.slingshot.reset()
-        self.physics.cannon.reset()
+        self._reset_launchers()
         self.clear_objects()
         if config.shape_type in ["square", "triangle"]:
             config.shape_type = "circle"
@@ -711,7 +882,7 @@ class SimulationUI:
         """Установка формы круга."""
         config.shape_type = "circle"
         config.static_mode = False
-        self.physics.slingshot.reset()
+        self.physics.commands.submit(self.physics.slingshot.reset)
         self._update_shape_buttons()
 
     def set_square_shape(self):
@@ -720,7 +891,7 @@ class SimulationUI:
             return
         config.shape_type = "square"
         config.static_mode = False
-        self.physics.slingshot.reset()
+        self.physics.commands.submit(self.physics.slingshot.reset)
         self._update_shape_buttons()
 
     def set_triangle_shape(self):
@@ -729,14 +900,14 @@ class SimulationUI:
             return
         config.shape_type = "triangle"
         config.static_mode = False
-        self.physics.slingshot.reset()
+        self.physics.commands.submit(self.physics.slingshot.reset)
         self._update_shape_buttons()
 
     def set_button_shape(self):
         """Установка формы кнопки."""
         config.shape_type = "button"
         config.static_mode = True
-        self.physics.slingshot.reset()
+        self.physics.commands.submit(self.physics.slingshot.reset)
         self._update_shape_buttons()
 
     def toggle_color_effect(self):
@@ -1,5 +1,8 @@
+import math
 import matplotlib.pyplot as plt
 from collections import defaultdict
+import trajectory
+import config
 
 
 def plot_velocity_vs_time(cannon):
@@ -8,9 +11,11 @@ def plot_velocity_vs_time(cannon):
         return
 
     times, velocities = zip(*cannon.velocity_points)
+    predicted = trajectory.solve(config.angle, config.initial_velocity / 100, record=True)
 
     plt.figure(figsize=(10, 6))
     plt.plot(times, velocities, 'b-', label='Скорость шара')
+    plt.plot(predicted["times"], predicted["speeds"], 'c--', label='Расчёт с сопротивлением')
     plt.xlabel('Время (с)')
     plt.ylabel('Скорость (м/с)')
     plt.title('Зависимость скорости шара от времени')
@@ -20,24 +25,36 @@ def plot_velocity_vs_time(cannon):
 
 
 def plot_range_vs_angle(cannon):
-    """Отрисовка графика дальности полёта от угла наклона."""
-    if not cannon.range_data:
-        return
+    """Отрисовка графика дальности полёта от угла наклона.
+
+    Кроме выстрелов пушки строится расчётная кривая дальности для текущей
+    начальной скорости, поэтому график доступен и без выстрелов. Кривая
+    считается шагами мира (world_steps), как сами выстрелы, а выстрелы с
+    другой начальной скоростью (и записи без скорости из старых файлов
+    состояния) на график не попадают.
+    """
+    velocity = config.initial_velocity / 100
+    # Шаг мира — 1/60 с, как в main.py и headless.py
+    predicted_angles, predicted_ranges = trajectory.predict_range_curve(
+        velocity, world_steps=True, dt=1 / 60)
 
     # Средние значения дальности для повторяющихся углов
     angle_ranges = defaultdict(list)
-    for angle, range_m in cannon.range_data:
-        angle_ranges[angle].append(range_m)
-    averaged_data = [(angle, sum(ranges) / len(ranges)) for angle, ranges in angle_ranges.items()]
-    averaged_data.sort()  # Сортировка по углу
-
-    angles, ranges = zip(*averaged_data)
+    for angle, range_m, *shot_velocity in cannon.range_data:
+        if shot_velocity and math.isclose(shot_velocity[0], velocity):
+            angle_ranges[angle].append(range_m)
 
     plt.figure(figsize=(10, 6))
-    plt.plot(angles, ranges, 'r-', label='Дальность полёта')
+    plt.plot(predicted_angles, predicted_ranges, 'k--', label='Расчёт с сопротивлением')
+    if angle_ranges:
+        averaged_data = [(angle, sum(ranges) / len(ranges)) for angle, ranges in angle_ranges.items()]
+        averaged_data.sort()  # Сортировка по углу
+
+        angles, ranges = zip(*averaged_data)
+        plt.plot(angles, ranges, 'r-o', label='Дальность полёта')
     plt.xlabel('Угол наклона (градусы)')
     plt.ylabel('Дальность полёта (м)')
-    plt.title('Зависимость дальности полёта от угла наклона')
+    plt.title(f'Зависимость дальности полёта от угла наклона ({velocity:g} м/с)')
     plt.legend()
     plt.grid(True)
     plt.show()  # Показать миру график
\ No newline at end of file